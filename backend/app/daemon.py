@@ -0,0 +1,297 @@
+"""
+常驻 MCP 守护进程。
+
+MCP 客户端每次会话都会重新启动 mcp_server.py。设置 FIGMA_MCP_DAEMON=1 后，stdio 启动只负责把
+stdin / stdout 转发到本机常驻进程 (首次启动时自动拉起)，转发端只依赖标准库，无需导入 mcp 与各存储后端；
+守护进程中的已导入模块、令牌池额度状态、共享缓存的内存层与 SQLite 连接在会话之间保留。
+
+守护进程监听 Unix socket，位于仅当前用户可访问的目录中 (socket 权限 0600)，其他本机用户无法借用
+当前用户的 Figma token 调用工具。socket 文件名包含存储配置与 token 的摘要，配置不同的启动不会连接到
+以其他配置运行的守护进程。不支持 Unix socket 的平台 (Windows) 上直接在进程内运行。
+
+    python mcp_server.py --daemon          # 手动启动守护进程
+    FIGMA_MCP_DAEMON=1 python mcp_server.py  # stdio 启动，连接 (或拉起) 守护进程
+"""
+import hashlib
+import logging
+import os
+import socket
+import stat
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# 无会话连接超过该时间 (秒) 后守护进程自动退出，0 表示不退出
+DEFAULT_IDLE_TIMEOUT = 1800.0
+# 单条 JSON-RPC 消息的最大长度
+MAX_MESSAGE_SIZE = 64 * 1024 * 1024
+# 决定存储后端与所用 token 的环境变量，取值不同的启动使用不同的守护进程
+CONFIG_ENV_VARS = (
+    "FIGMA_CACHE_REMOTE_URL", "FIGMA_FILE_DATA_FOLDER", "FIGMA_INDEX_FOLDER", "FIGMA_TOKEN_STATE_DB",
+    "DB_HOST", "DB_PORT", "DB_NAME", "DB_USER", "DB_PASSWORD",
+    "FIGMA_ACCESS_TOKEN", "FIGMA_ACCESS_TOKENS",
+)
+
+
+def daemon_supported() -> bool:
+    return hasattr(socket, "AF_UNIX")
+
+
+def config_digest(script: str) -> str:
+    """当前配置的摘要；相对路径按当前工作目录解析，与进程内运行时一致。"""
+    values = [os.path.abspath(script)]
+    for name in CONFIG_ENV_VARS:
+        value = os.getenv(name) or ""
+        if name in ("FIGMA_FILE_DATA_FOLDER", "FIGMA_INDEX_FOLDER", "FIGMA_TOKEN_STATE_DB") and value:
+            value = os.path.abspath(value)
+        values.append(f"{name}={value}")
+    return hashlib.sha256("\0".join(values).encode("utf-8")).hexdigest()[:16]
+
+
+def _runtime_dir() -> str:
+    """仅当前用户可访问的目录，权限不符或属于其他用户时拒绝使用。"""
+    base = os.getenv("XDG_RUNTIME_DIR")
+    folder = os.path.join(base, "figma-mcp") if base else \
+        os.path.join(tempfile.gettempdir(), f"figma-mcp-{os.getuid()}")
+    os.makedirs(folder, mode=0o700, exist_ok=True)
+    info = os.lstat(folder)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise RuntimeError(f"Daemon directory {folder} must be a directory owned by the current user with mode 0700")
+    return folder
+
+
+def daemon_socket_path(script: str) -> str:
+    return os.getenv("FIGMA_MCP_DAEMON_SOCKET") or \
+        os.path.join(_runtime_dir(), f"daemon-{config_digest(script)}.sock")
+
+
+def daemon_log_path() -> str:
+    # 默认与 socket 放在同一个仅当前用户可访问的目录中，多用户主机上互不冲突
+    return os.getenv("FIGMA_MCP_DAEMON_LOG") or os.path.join(_runtime_dir(), "daemon.log")
+
+
+def _connect(path: str) -> Optional[socket.socket]:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def _spawn_daemon(script: str) -> subprocess.Popen:
+    log = open(daemon_log_path(), "ab")
+    try:
+        return subprocess.Popen(
+            [sys.executable, os.path.abspath(script), "--daemon"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=log,
+            # 与当前启动相同的工作目录，相对路径配置的解析结果 (及配置摘要) 保持一致
+            cwd=os.getcwd(),
+            start_new_session=True,
+        )
+    finally:
+        log.close()
+
+
+def _relay(sock: socket.socket):
+    """在 stdio 与守护进程连接之间双向转发字节，任一方向结束即断开。"""
+    stdin, stdout = sys.stdin.buffer, sys.stdout.buffer
+
+    def upstream():
+        try:
+            while True:
+                chunk = stdin.read1(65536)
+                if not chunk:
+                    break
+                sock.sendall(chunk)
+        except OSError:
+            pass
+        finally:
+            try:
+                sock.shutdown(socket.SHUT_WR)
+            except OSError:
+                pass
+
+    threading.Thread(target=upstream, daemon=True).start()
+    try:
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            stdout.write(chunk)
+            stdout.flush()
+    except OSError:
+        pass
+    finally:
+        sock.close()
+
+
+def attach(script: str, start_timeout: float = 15.0) -> bool:
+    """
+    连接常驻守护进程并转发当前 stdio 会话，守护进程未运行时先启动它。
+    无法连接时返回 False，由调用方退回进程内运行。
+    """
+    if not daemon_supported():
+        return False
+    try:
+        path = daemon_socket_path(script)
+    except (OSError, RuntimeError) as e:
+        logger.warning(f"MCP daemon unavailable, running in process: {e}")
+        return False
+    sock = _connect(path)
+    if sock is None:
+        try:
+            process = _spawn_daemon(script)
+        except OSError as e:
+            logger.warning(f"Could not start MCP daemon, running in process: {e}")
+            return False
+        deadline = time.monotonic() + start_timeout
+        while sock is None and time.monotonic() < deadline:
+            time.sleep(0.05)
+            sock = _connect(path)
+            if sock is None and process.poll() is not None:
+                # 守护进程启动失败 (如 mcp 版本不兼容)，详情见日志；另一启动已拉起的守护进程再尝试一次
+                sock = _connect(path)
+                break
+    if sock is None:
+        logger.warning(f"MCP daemon did not start (see {daemon_log_path()}), running in process")
+        return False
+    _relay(sock)
+    return True
+
+
+class _SocketLines:
+    """将 socket 连接包装为 stdio_server 所需的按行读取 / 写入接口。"""
+
+    def __init__(self, stream):
+        from anyio.streams.buffered import BufferedByteReceiveStream
+
+        self._stream = stream
+        self._buffered = BufferedByteReceiveStream(stream)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> str:
+        import anyio
+
+        try:
+            line = await self._buffered.receive_until(b"\n", MAX_MESSAGE_SIZE)
+        except (anyio.EndOfStream, anyio.IncompleteRead, anyio.BrokenResourceError, anyio.ClosedResourceError):
+            raise StopAsyncIteration
+        return line.decode("utf-8", errors="replace")
+
+    async def write(self, text: str):
+        await self._stream.send(text.encode("utf-8"))
+
+    async def flush(self):
+        pass
+
+
+def _check_fastmcp(mcp):
+    """
+    守护进程依赖 FastMCP 的内部属性 (_tool_manager / _mcp_server / Tool.fn / Tool.is_async)，
+    在 mcp 1.x 上验证通过。属性缺失时直接报错，而不是以错误的方式运行。
+    """
+    try:
+        from importlib.metadata import version
+
+        mcp_version = version("mcp")
+    except Exception:
+        mcp_version = "unknown"
+    try:
+        server = mcp._mcp_server
+        server.run, server.create_initialization_options
+        for tool in mcp._tool_manager.list_tools():
+            tool.fn, tool.is_async
+    except AttributeError as e:
+        raise RuntimeError(
+            f"Daemon mode is not supported with mcp {mcp_version} ({e}); install mcp<2 or unset FIGMA_MCP_DAEMON"
+        ) from e
+
+
+def _run_tools_in_threads(mcp):
+    """
+    FastMCP 直接在事件循环中调用同步工具，一个会话中耗时的工具 (未命中缓存的 Figma 请求、图片优化)
+    会阻塞所有会话。守护进程中将同步工具改为在工作线程中执行。
+    """
+    import functools
+
+    import anyio.to_thread
+
+    for tool in mcp._tool_manager.list_tools():
+        if tool.is_async:
+            continue
+
+        async def run_in_thread(*args, _fn=tool.fn, **kwargs):
+            return await anyio.to_thread.run_sync(functools.partial(_fn, *args, **kwargs))
+
+        tool.fn, tool.is_async = run_in_thread, True
+
+
+def serve(mcp, script: str, idle_timeout: Optional[float] = None):
+    """
+    运行守护进程：每个 socket 连接是一个独立的 MCP 会话 (与 stdio 相同的逐行 JSON-RPC)，
+    共享同一个 FastMCP 实例与进程内状态。
+    """
+    import anyio
+    from mcp.server.stdio import stdio_server
+
+    if not daemon_supported():
+        raise RuntimeError("Daemon mode requires Unix domain sockets")
+    path = daemon_socket_path(script)
+    existing = _connect(path)
+    if existing is not None:
+        existing.close()
+        logger.info(f"Figma MCP daemon already running on {path}")
+        return
+    _check_fastmcp(mcp)
+    if idle_timeout is None:
+        idle_timeout = float(os.getenv("FIGMA_MCP_DAEMON_IDLE_TIMEOUT") or DEFAULT_IDLE_TIMEOUT)
+    _run_tools_in_threads(mcp)
+    state = {"active": 0, "last_activity": time.monotonic()}
+
+    async def handle(stream):
+        state["active"] += 1
+        try:
+            lines = _SocketLines(stream)
+            async with stdio_server(lines, lines) as (read_stream, write_stream):
+                # 与 FastMCP.run_stdio_async 相同，只是传输换成了 socket 连接
+                server = mcp._mcp_server
+                await server.run(read_stream, write_stream, server.create_initialization_options())
+        except Exception as e:
+            logger.error(f"MCP session failed: {e}")
+        finally:
+            state["active"] -= 1
+            state["last_activity"] = time.monotonic()
+            await stream.aclose()
+
+    async def main():
+        # 所在目录仅当前用户可访问，socket 本身也只允许所有者连接
+        listener = await anyio.create_unix_listener(path, mode=0o600)
+        logger.info(f"Figma MCP daemon listening on {path}")
+        try:
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(listener.serve, handle)
+                if idle_timeout > 0:
+                    while True:
+                        await anyio.sleep(min(idle_timeout, 30.0))
+                        if state["active"] == 0 and time.monotonic() - state["last_activity"] >= idle_timeout:
+                            logger.info("Figma MCP daemon idle, shutting down")
+                            tg.cancel_scope.cancel()
+                            break
+        finally:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    anyio.run(main)
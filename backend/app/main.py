@@ -1,5 +1,6 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from app.database import engine, Base
 from app.routers import api
 
@@ -23,6 +24,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 共享缓存模式下条目体积较大，响应统一 gzip 压缩
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 app.include_router(api.router)
 
 
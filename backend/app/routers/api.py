@@ -1,12 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models import FigmaData
-from app.schemas import FigmaDataResponse
+from app.schemas import FigmaDataResponse, EntryLookupRequest
 from app.services.mcp_tools import get_figma_data_tool
 from app.repository import MySQLRepository
+from app.services.token_pool import get_token_pool, PRIORITY_BACKGROUND
 import os
 import json
+import gzip
+import hashlib
+from datetime import datetime
 
 router = APIRouter(prefix="/api", tags=["api"])
 
@@ -28,8 +34,6 @@ def list_cache(
         )
 
     # 记录时间范围过滤（按 updated_at）
-    from datetime import datetime
-
     def _parse_dt(value: str):
         try:
             # 兼容 'YYYY-MM-DD' 或 ISO 字符串
@@ -79,6 +83,129 @@ def list_cache(
         "items": result_items
     }
 
+def _etag(data: str) -> str:
+    return '"' + hashlib.sha1((data or "").encode("utf-8")).hexdigest() + '"'
+
+@router.get("/entry")
+def get_entry(file_key: str, request: Request, node_id: str = None, db: Session = Depends(get_db)):
+    """
+    共享缓存：按 (file_key, node_id) 读取缓存条目，供 RemoteRepository 使用。
+    支持 If-None-Match / ETag 协商，命中时返回 304。
+    """
+    item = MySQLRepository(db).get_data(file_key, node_id)
+    if not item:
+        raise HTTPException(status_code=404, detail="Item not found")
+    etag = _etag(item.data)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=json.dumps(_entry_body(item), ensure_ascii=False), media_type="application/json", headers={"ETag": etag})
+
+def _entry_body(item) -> dict:
+    return {
+        "file_key": item.file_key,
+        "node_id": item.node_id,
+        "name": item.name,
+        "depth": item.depth,
+        "last_modified": item.last_modified.isoformat() if item.last_modified else None,
+        "updated_at": item.updated_at.isoformat() if item.updated_at else None,
+        "data": item.data,
+    }
+
+# 单次批量读取的最大条目数
+MAX_LOOKUP_KEYS = 500
+
+@router.post("/entries/lookup")
+def lookup_entries(body: EntryLookupRequest, db: Session = Depends(get_db)):
+    """
+    共享缓存：一次读取多个缓存条目 (一条 IN 查询)，供 RemoteRepository.get_many 使用。
+    每个 key 可携带 etag，未变化的条目只返回 status 304；结果顺序与请求一致，不存在的条目为 404。
+    """
+    if len(body.keys) > MAX_LOOKUP_KEYS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_LOOKUP_KEYS} keys per lookup")
+    keys = [(k.file_key, k.node_id or None) for k in body.keys]
+    found = MySQLRepository(db).get_many(keys)
+    items = []
+    for k, key in zip(body.keys, keys):
+        item = found.get(key)
+        result = {"file_key": key[0], "node_id": key[1]}
+        if not item:
+            result["status"] = 404
+        else:
+            result["etag"] = _etag(item.data)
+            if k.etag == result["etag"]:
+                result["status"] = 304
+            else:
+                result["status"] = 200
+                result["entry"] = _entry_body(item)
+        items.append(result)
+    return Response(content=json.dumps({"items": items}, ensure_ascii=False), media_type="application/json")
+
+@router.get("/entries")
+def list_entries(
+    file_key: List[str] = Query(None),
+    updated_from: datetime = None,
+    updated_to: datetime = None,
+    cursor: int = 0,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+):
+    """
+    共享缓存：按 id 游标分页遍历缓存条目 (含数据)，供 RemoteRepository.iter_entries (如缓存包导出) 使用。
+    next_cursor 为空表示已到末尾。
+    """
+    query = db.query(FigmaData).filter(FigmaData.id > cursor)
+    if file_key:
+        query = query.filter(FigmaData.file_key.in_(file_key))
+    if updated_from:
+        query = query.filter(FigmaData.updated_at >= updated_from)
+    if updated_to:
+        query = query.filter(FigmaData.updated_at <= updated_to)
+    items = query.order_by(FigmaData.id).limit(limit).all()
+    return {
+        "items": [_entry_body(item) for item in items],
+        "next_cursor": items[-1].id if len(items) == limit else None,
+    }
+
+def _parse_entry(raw: bytes, gzipped: bool) -> dict:
+    try:
+        if gzipped:
+            raw = gzip.decompress(raw)
+        payload = json.loads(raw)
+        payload["file_key"]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid entry payload")
+    return payload
+
+def _save_entry(db: Session, payload: dict) -> str:
+    last_modified = None
+    if payload.get("last_modified"):
+        try:
+            last_modified = datetime.fromisoformat(payload["last_modified"])
+        except ValueError:
+            last_modified = None
+    data = payload.get("data")
+    MySQLRepository(db).save_data(
+        file_key=payload["file_key"],
+        node_id=payload.get("node_id") or None,
+        data=data,
+        name=payload.get("name"),
+        depth=payload.get("depth"),
+        last_modified=last_modified,
+    )
+    data_str = json.dumps(data) if not isinstance(data, str) else data
+    return _etag(data_str)
+
+@router.put("/entry")
+async def put_entry(request: Request, db: Session = Depends(get_db)):
+    """
+    共享缓存：写入缓存条目。请求体可使用 Content-Encoding: gzip 压缩。
+    解压、解析与保存 (MySQL 提交及各 SQLite 索引) 都是阻塞操作，在线程池中执行，不阻塞其他请求。
+    """
+    raw = await request.body()
+    payload = await run_in_threadpool(_parse_entry, raw, request.headers.get("content-encoding") == "gzip")
+    etag = await run_in_threadpool(_save_entry, db, payload)
+    return Response(content=json.dumps({"message": "Saved successfully"}), media_type="application/json", headers={"ETag": etag})
+
 @router.delete("/cache/{id}")
 def delete_cache(id: int, db: Session = Depends(get_db)):
     item = db.query(FigmaData).filter(FigmaData.id == id).first()
@@ -86,6 +213,7 @@ def delete_cache(id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Item not found")
     db.delete(item)
     db.commit()
+    MySQLRepository(db).drop_indexes(item.file_key, item.node_id)
     return {"message": "Deleted successfully"}
 
 @router.post("/sync/{id}")
@@ -94,7 +222,7 @@ def sync_cache(id: int, db: Session = Depends(get_db)):
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     
-    token = os.getenv("FIGMA_ACCESS_TOKEN")
+    token = get_token_pool()
     if not token:
         raise HTTPException(status_code=500, detail="FIGMA_ACCESS_TOKEN not set")
         
@@ -107,6 +235,7 @@ def sync_cache(id: int, db: Session = Depends(get_db)):
             node_id=item.node_id,
             depth=item.depth,
             force_refresh=True,
+            priority=PRIORITY_BACKGROUND,
         )
         return {"message": "Synced successfully"}
     except Exception as e:
@@ -127,3 +256,90 @@ def get_cache_detail(id: int, db: Session = Depends(get_db)):
         "updated_at": item.updated_at,
         "data": json.loads(item.data) if item.data else None
     }
+
+@router.get("/search")
+def search_nodes(
+    q: str,
+    file_key: str = None,
+    node_type: str = None,
+    limit: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_db),
+):
+    """
+    在已缓存文档中按节点名称 / 文本内容 / 类型搜索，返回节点 id、祖先路径与包围盒。
+    """
+    repo = MySQLRepository(db)
+    items = repo.search_nodes(q, file_key=file_key, node_type=node_type, limit=limit)
+    return {"total": len(items), "items": items}
+
+@router.post("/search/rebuild")
+def rebuild_search_index(db: Session = Depends(get_db)):
+    repo = MySQLRepository(db)
+    count = repo.rebuild_indexes()
+    return {"message": "Rebuilt successfully", "count": count}
+
+@router.get("/layout")
+def query_layout(
+    file_key: str,
+    mode: str = "intersects",
+    x: float = 0,
+    y: float = 0,
+    width: float = 0,
+    height: float = 0,
+    node_id: str = None,
+    cache_node_id: str = None,
+    node_type: str = None,
+    limit: int = Query(None, ge=1, le=1000),
+    page_id: str = None,
+    db: Session = Depends(get_db),
+):
+    repo = MySQLRepository(db)
+    try:
+        items = repo.query_layout(file_key, mode=mode, x=x, y=y, width=width, height=height, node_id=node_id,
+                                  cache_node_id=cache_node_id, node_type=node_type, limit=limit, page_id=page_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"total": len(items), "items": items}
+
+@router.get("/changes")
+def get_changes(
+    file_key: str,
+    node_id: str = None,
+    from_version: str = None,
+    to_version: str = None,
+    db: Session = Depends(get_db),
+):
+    repo = MySQLRepository(db)
+    try:
+        return repo.get_changes(file_key, node_id, from_version=from_version, to_version=to_version)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.get("/catalog")
+def lookup_catalog(
+    q: str = None,
+    key: str = None,
+    kind: str = None,
+    file_key: str = None,
+    limit: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_db),
+):
+    """
+    按名称或 key 查找组件 / 组件集 / 样式，返回每个文件中的定义节点 id 与实例数量。
+    """
+    repo = MySQLRepository(db)
+    try:
+        items = repo.lookup_catalog(query=q, key=key, kind=kind, file_key=file_key, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"total": len(items), "items": items}
+
+@router.get("/catalog/usages")
+def catalog_usages(
+    key: str,
+    file_key: str = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+):
+    repo = MySQLRepository(db)
+    return repo.catalog_usages(key, file_key=file_key, limit=limit)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, Any
+from typing import Optional, Any, List
 from datetime import datetime
 
 class FigmaDataBase(BaseModel):
@@ -21,3 +21,11 @@ class FigmaDataResponse(FigmaDataBase):
 
 class SyncRequest(BaseModel):
     id: int
+
+class EntryKey(BaseModel):
+    file_key: str
+    node_id: Optional[str] = None
+    etag: Optional[str] = None # 调用方已缓存版本的 ETag，未变化时不返回数据
+
+class EntryLookupRequest(BaseModel):
+    keys: List[EntryKey]
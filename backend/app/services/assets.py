@@ -0,0 +1,216 @@
+import logging
+import os
+import re
+import struct
+import zlib
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# 仅包含文本 / 时间等元数据、不影响像素与色彩解释的辅助块
+PNG_STRIP_CHUNKS = {b"tEXt", b"zTXt", b"iTXt", b"tIME"}
+PNG_DEFLATE_CANDIDATES = [
+    (9, zlib.Z_DEFAULT_STRATEGY),
+    (9, zlib.Z_FILTERED),
+    (1, zlib.Z_DEFAULT_STRATEGY),
+]
+
+_SVG_PATTERNS = [
+    (re.compile(r"<\?xml[^>]*\?>", re.S), ""),
+    (re.compile(r"<!DOCTYPE[^>]*>", re.S), ""),
+    (re.compile(r"<!--.*?-->", re.S), ""),
+    (re.compile(r"<metadata\b.*?</metadata>", re.S), ""),
+    (re.compile(r"\s+(?:sketch|inkscape|sodipodi|figma)[:\w-]*=\"[^\"]*\""), ""),
+]
+# <title> / <desc> 是读屏软件使用的无障碍文本，仅在显式要求时去除
+_SVG_DESCRIPTIONS = re.compile(r"<(title|desc)\b.*?</\1>", re.S)
+# <text> 内 tspan 之间的空白会作为文字渲染，不能折叠
+_SVG_TEXT = re.compile(r"(<text\b.*?</text>)", re.S)
+_SVG_TAG_GAP = re.compile(r"(?:(?<=>)|^)\s+(?=<|$)")
+# 只对几何属性做坐标取整，避免改动 id / href 等属性
+_SVG_GEOMETRY_ATTRS = (
+    "d|points|viewBox|x|y|x1|y1|x2|y2|cx|cy|fx|fy|r|rx|ry|"
+    "width|height|stroke-width|stroke-dasharray|stroke-dashoffset"
+)
+_SVG_ATTR = re.compile(r'(\s(?:' + _SVG_GEOMETRY_ATTRS + r')=")([^"]*)(")')
+# 变换矩阵中的缩放系数可能很小 (Figma 图片填充为 scale(0.00390625) 等)，按有效数字而非小数位取整
+_SVG_TRANSFORM_ATTR = re.compile(r'(\s(?:transform|gradientTransform|patternTransform)=")([^"]*)(")')
+SVG_TRANSFORM_PRECISION = 5
+_SVG_NUMBER = re.compile(r"-?\d*\.\d+(?:[eE][-+]?\d+)?")
+
+
+def _short_number(text: str) -> str:
+    if text in ("-0", ""):
+        return "0"
+    # 0.5 -> .5 / -0.5 -> -.5
+    if text.startswith("0.") and len(text) > 2:
+        return text[1:]
+    if text.startswith("-0.") and len(text) > 3:
+        return "-" + text[2:]
+    return text
+
+
+def _round_number(match: "re.Match", precision: int) -> str:
+    value = round(float(match.group(0)), precision)
+    return _short_number(f"{value:.{precision}f}".rstrip("0").rstrip("."))
+
+
+def _round_significant(match: "re.Match", digits: int) -> str:
+    text = f"{float(match.group(0)):.{digits}g}"
+    if "e" not in text and "." in text:
+        text = text.rstrip("0").rstrip(".")
+    return _short_number(text)
+
+
+def minify_svg(content: str, precision: int = 2, strip_descriptions: bool = False) -> str:
+    """
+    去除元数据、注释与标签间空白 (<text> 元素内除外)，并将属性中的坐标保留 precision 位小数，
+    变换属性 (transform 等) 保留 SVG_TRANSFORM_PRECISION 位有效数字。
+    strip_descriptions=True 时同时去除 <title> / <desc>。
+    """
+    for pattern, replacement in _SVG_PATTERNS:
+        content = pattern.sub(replacement, content)
+    if strip_descriptions:
+        content = _SVG_DESCRIPTIONS.sub("", content)
+    # split 的捕获组使 <text> 片段位于奇数下标
+    parts = _SVG_TEXT.split(content)
+    content = "".join(part if i % 2 else _SVG_TAG_GAP.sub("", part) for i, part in enumerate(parts))
+
+    def _attr(match: "re.Match") -> str:
+        value = _SVG_NUMBER.sub(lambda m: _round_number(m, precision), match.group(2))
+        return match.group(1) + value + match.group(3)
+
+    def _transform(match: "re.Match") -> str:
+        value = _SVG_NUMBER.sub(lambda m: _round_significant(m, SVG_TRANSFORM_PRECISION), match.group(2))
+        return match.group(1) + value + match.group(3)
+
+    content = _SVG_TRANSFORM_ATTR.sub(_transform, content)
+    return _SVG_ATTR.sub(_attr, content).strip()
+
+
+def recompress_png(data: bytes) -> bytes:
+    """
+    无损重压缩 PNG：合并 IDAT 并以 zlib 最高压缩级别重新压缩，去除文本 / 时间元数据块。
+    像素数据与色彩相关块 (PLTE / tRNS / gAMA / iCCP 等) 保持不变。
+    沿用原有的逐行滤波方式，不重新选择滤波器，因此对 Figma 导出的 PNG 通常只能减小几个百分点甚至更少。
+    """
+    if not data.startswith(PNG_SIGNATURE):
+        raise ValueError("Not a PNG file")
+    chunks = []
+    idat = []
+    pos = len(PNG_SIGNATURE)
+    while pos + 8 <= len(data):
+        length, tag = struct.unpack(">I4s", data[pos:pos + 8])
+        body = data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+        if tag == b"IDAT":
+            if not idat:
+                chunks.append((b"IDAT", None))
+            idat.append(body)
+        elif tag not in PNG_STRIP_CHUNKS:
+            chunks.append((tag, body))
+        if tag == b"IEND":
+            break
+
+    raw = zlib.decompress(b"".join(idat))
+    # 不同数据上各策略互有胜负 (渐变等场景下低级别有时反而更小)，取最小结果
+    compressed = None
+    for level, strategy in PNG_DEFLATE_CANDIDATES:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 15, 9, strategy)
+        candidate = compressor.compress(raw) + compressor.flush()
+        if compressed is None or len(candidate) < len(compressed):
+            compressed = candidate
+
+    out = [PNG_SIGNATURE]
+    for tag, body in chunks:
+        if body is None:
+            body = compressed
+        out.append(struct.pack(">I", len(body)) + tag + body + struct.pack(">I", zlib.crc32(tag + body) & 0xFFFFFFFF))
+    return b"".join(out)
+
+
+def _write_if_smaller(path: str, original: bytes, optimized: bytes) -> int:
+    if len(optimized) < len(original):
+        with open(path, "wb") as f:
+            f.write(optimized)
+        return len(optimized)
+    return len(original)
+
+
+def _emit_webp(path: str) -> Dict[str, Any]:
+    try:
+        from PIL import Image
+    except ImportError:
+        return {"skipped": "Pillow is not installed"}
+    webp_path = os.path.splitext(path)[0] + ".webp"
+    with Image.open(path) as image:
+        image.save(webp_path, "WEBP", lossless=True, method=6)
+    return {"path": webp_path, "size": os.path.getsize(webp_path)}
+
+
+def optimize_asset(path: str, webp: bool = False, svg_precision: int = 2, optimize: bool = True) -> Dict[str, Any]:
+    """
+    优化单个已下载的资源文件，返回优化前后的大小。在进程池中执行，因此只接收可序列化参数。
+    optimize=False 时不改动原文件，只在 webp=True 时为 PNG 输出 WebP。
+    """
+    result: Dict[str, Any] = {"path": path, "before": None, "after": None, "optimized": optimize}
+    try:
+        with open(path, "rb") as f:
+            original = f.read()
+        result["before"] = len(original)
+        ext = os.path.splitext(path)[1].lower()
+        if not optimize:
+            result["after"] = len(original)
+            if webp and (ext == ".png" or original.startswith(PNG_SIGNATURE)):
+                result["webp"] = _emit_webp(path)
+        elif ext == ".svg":
+            optimized = minify_svg(original.decode("utf-8"), svg_precision).encode("utf-8")
+            result["after"] = _write_if_smaller(path, original, optimized)
+        elif ext == ".png" or original.startswith(PNG_SIGNATURE):
+            result["after"] = _write_if_smaller(path, original, recompress_png(original))
+            if webp:
+                result["webp"] = _emit_webp(path)
+        else:
+            result["after"] = len(original)
+    except Exception as e:
+        result["error"] = str(e)
+    return result
+
+
+def optimize_assets(
+    paths: List[str], webp: bool = False, max_workers: Optional[int] = None, optimize: bool = True
+) -> List[Dict[str, Any]]:
+    """
+    在进程池中并行优化多个文件 (CPU 密集型)，结果顺序与输入一致。单个文件时直接在当前进程执行。
+    """
+    if not paths:
+        return []
+    if len(paths) == 1:
+        return [optimize_asset(paths[0], webp, optimize=optimize)]
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = min(len(paths), max_workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(
+            optimize_asset, paths, [webp] * len(paths), [2] * len(paths), [optimize] * len(paths),
+        ))
+
+
+def format_optimization(result: Dict[str, Any]) -> str:
+    name = os.path.basename(result["path"])
+    if result.get("error"):
+        return f"Failed to optimize {name}: {result['error']}"
+    before, after = result["before"], result["after"]
+    if result.get("optimized", True):
+        saved = (1 - after / before) * 100 if before else 0.0
+        line = f"Optimized {name}: {before} -> {after} bytes (-{saved:.1f}%)"
+    else:
+        line = f"Kept {name}: {before} bytes"
+    webp = result.get("webp")
+    if webp:
+        if webp.get("path"):
+            line += f", WebP: {os.path.basename(webp['path'])} {webp['size']} bytes"
+        else:
+            line += f", WebP skipped: {webp.get('skipped')}"
+    return line
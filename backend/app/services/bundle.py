@@ -0,0 +1,159 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import tarfile
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.repository import FigmaDataRepository
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_FORMAT = "figma-mcp-cache-bundle"
+BUNDLE_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+ENTRIES_NAME = "entries.jsonl"
+
+
+def _iso(value: Any) -> Optional[str]:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _parse_dt(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def export_bundle(
+    repo: FigmaDataRepository,
+    path: str,
+    file_keys: Optional[List[str]] = None,
+    updated_from: Optional[datetime] = None,
+    updated_to: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """
+    将缓存条目打包为 tar.gz 归档：manifest.json (条目数、SHA-256 校验和、筛选条件) + entries.jsonl。
+    条目先流式写入临时文件并同时计算校验和，内存占用与缓存规模无关。
+    """
+    digest = hashlib.sha256()
+    count = 0
+    file_key_set = set()
+    with tempfile.NamedTemporaryFile("wb", suffix=".jsonl", delete=False) as tmp:
+        tmp_path = tmp.name
+        for item in repo.iter_entries(file_keys=file_keys, updated_from=updated_from, updated_to=updated_to):
+            line = json.dumps({
+                "file_key": item.file_key,
+                "node_id": item.node_id,
+                "name": item.name,
+                "depth": item.depth,
+                "last_modified": _iso(item.last_modified),
+                "updated_at": _iso(getattr(item, "updated_at", None)),
+                "data": item.data,
+            }, ensure_ascii=False).encode("utf-8") + b"\n"
+            tmp.write(line)
+            digest.update(line)
+            count += 1
+            file_key_set.add(item.file_key)
+
+    manifest = {
+        "format": BUNDLE_FORMAT,
+        "version": BUNDLE_VERSION,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "count": count,
+        "file_keys": sorted(file_key_set),
+        "sha256": digest.hexdigest(),
+        "filters": {
+            "file_keys": file_keys,
+            "updated_from": _iso(updated_from),
+            "updated_to": _iso(updated_to),
+        },
+    }
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with tarfile.open(path, "w:gz", compresslevel=6) as tar:
+            manifest_bytes = json.dumps(manifest, indent=2, ensure_ascii=False).encode("utf-8")
+            info = tarfile.TarInfo(MANIFEST_NAME)
+            info.size = len(manifest_bytes)
+            info.mtime = int(datetime.now().timestamp())
+            tar.addfile(info, io.BytesIO(manifest_bytes))
+            tar.add(tmp_path, arcname=ENTRIES_NAME)
+    finally:
+        os.remove(tmp_path)
+    return manifest
+
+
+def _open_entries(tar: tarfile.TarFile):
+    manifest = None
+    for member in tar:
+        if member.name == MANIFEST_NAME:
+            manifest = json.load(tar.extractfile(member))
+        elif member.name == ENTRIES_NAME:
+            if manifest is None:
+                raise ValueError(f"{MANIFEST_NAME} must precede {ENTRIES_NAME}")
+            return manifest, tar.extractfile(member)
+    raise ValueError("Invalid bundle: entries not found")
+
+
+def read_manifest(path: str) -> Dict[str, Any]:
+    with tarfile.open(path, "r|gz") as tar:
+        for member in tar:
+            if member.name == MANIFEST_NAME:
+                return json.load(tar.extractfile(member))
+    raise ValueError("Invalid bundle: manifest not found")
+
+
+def verify_bundle(path: str) -> Dict[str, Any]:
+    """流式校验条目的 SHA-256 与数量，不通过时抛出 ValueError。"""
+    with tarfile.open(path, "r|gz") as tar:
+        manifest, entries = _open_entries(tar)
+        if manifest.get("format") != BUNDLE_FORMAT:
+            raise ValueError(f"Unsupported bundle format: {manifest.get('format')}")
+        digest = hashlib.sha256()
+        count = 0
+        for line in entries:
+            digest.update(line)
+            count += 1
+    if digest.hexdigest() != manifest.get("sha256") or count != manifest.get("count"):
+        raise ValueError("Bundle checksum mismatch")
+    return manifest
+
+
+def _iter_bundle_entries(path: str) -> Iterator[Dict[str, Any]]:
+    with tarfile.open(path, "r|gz") as tar:
+        _, entries = _open_entries(tar)
+        for line in entries:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            entry["last_modified"] = _parse_dt(entry.get("last_modified"))
+            yield entry
+
+
+def import_bundle(repo: FigmaDataRepository, path: str, batch_size: int = 200, verify: bool = True) -> Dict[str, Any]:
+    """
+    导入归档中的缓存条目。先流式校验校验和，再流式读取并按批写入 (repo.save_many)，
+    已存在的同 key 条目会被覆盖。
+    """
+    manifest = verify_bundle(path) if verify else read_manifest(path)
+    batch: List[Dict[str, Any]] = []
+    imported = 0
+    for entry in _iter_bundle_entries(path):
+        batch.append(entry)
+        if len(batch) >= batch_size:
+            repo.save_many(batch)
+            imported += len(batch)
+            logger.info(f"Imported {imported}/{manifest.get('count')} entries")
+            batch = []
+    if batch:
+        repo.save_many(batch)
+        imported += len(batch)
+    return {"imported": imported, "manifest": manifest}
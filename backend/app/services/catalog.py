@@ -0,0 +1,201 @@
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+from app.services.figma import iter_simplified_nodes
+from app.services.sqlite_index import SQLiteIndex
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS catalog_items (
+    file_key TEXT NOT NULL,
+    cache_node_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    item_id TEXT NOT NULL,
+    key TEXT,
+    name TEXT,
+    description TEXT,
+    style_type TEXT,
+    component_set_id TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_catalog_items_entry ON catalog_items (file_key, cache_node_id);
+CREATE INDEX IF NOT EXISTS idx_catalog_items_key ON catalog_items (key);
+CREATE INDEX IF NOT EXISTS idx_catalog_items_name ON catalog_items (name COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS catalog_usages (
+    file_key TEXT NOT NULL,
+    cache_node_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    item_id TEXT NOT NULL,
+    node_id TEXT NOT NULL,
+    node_name TEXT,
+    role TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_catalog_usages_entry ON catalog_usages (file_key, cache_node_id);
+CREATE INDEX IF NOT EXISTS idx_catalog_usages_item ON catalog_usages (file_key, item_id);
+"""
+
+KINDS = ("component", "component_set", "style")
+# catalog 字段 -> kind
+_SOURCES = (("components", "component"), ("componentSets", "component_set"), ("styles", "style"))
+
+
+class CatalogIndex(SQLiteIndex):
+    """
+    组件 / 组件集 / 样式目录。保存缓存条目时从 components、componentSets、styles 中提取定义，
+    并记录文档中的定义节点 (role=definition) 与引用它们的实例或样式使用节点 (role=instance / usage)。
+    样式使用节点来自 process_figma_response 输出的顶层 styleUsages。
+    查询按 (file_key, key) 聚合，不需要读取缓存数据本身。
+    """
+
+    SCHEMA = _SCHEMA
+
+    def _delete_entry(self, conn, file_key: str, cache_node_id: Optional[str]):
+        for table in ("catalog_items", "catalog_usages"):
+            conn.execute(f"DELETE FROM {table} WHERE file_key = ? AND cache_node_id = ?", (file_key, cache_node_id or ""))
+
+    def _index_document(self, conn: sqlite3.Connection, file_key: str, cache_node_id: Optional[str], data: Dict[str, Any]):
+        entry = cache_node_id or ""
+        items = []
+        for field, kind in _SOURCES:
+            for item_id, meta in (data.get(field) or {}).items():
+                meta = meta or {}
+                items.append((
+                    file_key, entry, kind, item_id, meta.get("key"), meta.get("name"), meta.get("description") or None,
+                    meta.get("styleType"), meta.get("componentSetId"),
+                ))
+
+        usages = []
+        names = {}
+        style_usages = data.get("styleUsages")
+        for node, _ in iter_simplified_nodes(data):
+            node_id, node_type = node.get("id"), node.get("type")
+            names[node_id] = node.get("name")
+            if node_type == "COMPONENT":
+                usages.append((file_key, entry, "component", node_id, node_id, node.get("name"), "definition"))
+            elif node_type == "COMPONENT_SET":
+                usages.append((file_key, entry, "component_set", node_id, node_id, node.get("name"), "definition"))
+            if node.get("componentId"):
+                usages.append((file_key, entry, "component", node["componentId"], node_id, node.get("name"), "instance"))
+            if style_usages is None:
+                # 早期格式的缓存条目在每个节点上保存 styles 引用
+                for style_id in set((node.get("styles") or {}).values()):
+                    usages.append((file_key, entry, "style", style_id, node_id, node.get("name"), "usage"))
+        for style_id, node_ids in (style_usages or {}).items():
+            for node_id in node_ids:
+                usages.append((file_key, entry, "style", style_id, node_id, names.get(node_id), "usage"))
+
+        self._delete_entry(conn, file_key, cache_node_id)
+        conn.executemany("INSERT INTO catalog_items VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", items)
+        conn.executemany("INSERT INTO catalog_usages VALUES (?, ?, ?, ?, ?, ?, ?)", usages)
+
+    def remove_document(self, file_key: str, cache_node_id: Optional[str]):
+        conn = self._connect()
+        with conn:
+            self._delete_entry(conn, file_key, cache_node_id)
+
+    def _counts(self, conn, file_key: str, kind: str, item_id: str) -> Dict[str, Any]:
+        # 同一节点可能同时存在于整文件缓存和节点缓存中，按 node_id 去重
+        rows = conn.execute(
+            "SELECT role, node_id FROM catalog_usages WHERE file_key = ? AND item_id = ? AND kind = ? "
+            "GROUP BY role, node_id",
+            (file_key, item_id, kind),
+        ).fetchall()
+        definitions = [node_id for role, node_id in rows if role == "definition"]
+        return {"node_ids": definitions, "instance_count": sum(1 for role, _ in rows if role != "definition")}
+
+    def lookup(
+        self,
+        query: Optional[str] = None,
+        key: Optional[str] = None,
+        kind: Optional[str] = None,
+        file_key: Optional[str] = None,
+        limit: int = 20,
+    ) -> List[Dict[str, Any]]:
+        """
+        按名称 (不区分大小写的子串匹配，如 "Button/Primary") 或组件 key 查找目录项。
+        每个文件中的每个 key 返回一条，包含定义节点 id 与实例 / 使用次数。
+        """
+        if kind and kind not in KINDS:
+            raise ValueError(f"Unknown kind: {kind}")
+        sql = (
+            "SELECT file_key, kind, item_id, key, name, description, style_type, component_set_id "
+            "FROM catalog_items WHERE 1 = 1"
+        )
+        params: List[Any] = []
+        if query:
+            sql += " AND name LIKE ? ESCAPE '\\' COLLATE NOCASE"
+            params.append("%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+        if key:
+            sql += " AND (key = ? OR item_id = ?)"
+            params += [key, key]
+        if kind:
+            sql += " AND kind = ?"
+            params.append(kind)
+        if file_key:
+            sql += " AND file_key = ?"
+            params.append(file_key)
+        sql += " ORDER BY length(name), name, file_key"
+
+        conn = self._connect()
+        results = []
+        seen = set()
+        for row_file_key, row_kind, item_id, item_key, name, description, style_type, component_set_id in conn.execute(sql, params):
+            dedupe = (row_file_key, row_kind, item_key or item_id)
+            if dedupe in seen:
+                continue
+            seen.add(dedupe)
+            item = {
+                "file_key": row_file_key,
+                "kind": row_kind,
+                "id": item_id,
+                "key": item_key,
+                "name": name,
+                "description": description,
+            }
+            if style_type:
+                item["style_type"] = style_type
+            if component_set_id:
+                item["component_set_id"] = component_set_id
+            item.update(self._counts(conn, row_file_key, row_kind, item_id))
+            results.append(item)
+            if len(results) >= limit:
+                break
+        return results
+
+    def usages(self, key: str, file_key: Optional[str] = None, limit: int = 100) -> Dict[str, Any]:
+        """
+        组件 / 样式 (按 key 或 id) 在各文件中的实例节点。返回每个文件的使用次数与节点列表 (最多 limit 个)。
+        """
+        conn = self._connect()
+        sql = "SELECT DISTINCT file_key, kind, item_id, name FROM catalog_items WHERE (key = ? OR item_id = ?)"
+        params: List[Any] = [key, key]
+        if file_key:
+            sql += " AND file_key = ?"
+            params.append(file_key)
+        targets = conn.execute(sql, params).fetchall()
+
+        files = []
+        total = 0
+        seen = set()
+        for target_file_key, kind, item_id, name in targets:
+            if (target_file_key, kind, item_id) in seen:
+                continue
+            seen.add((target_file_key, kind, item_id))
+            rows = conn.execute(
+                "SELECT node_id, MIN(node_name), MIN(cache_node_id) FROM catalog_usages "
+                "WHERE file_key = ? AND item_id = ? AND kind = ? AND role != 'definition' "
+                "GROUP BY node_id ORDER BY node_id",
+                (target_file_key, item_id, kind),
+            ).fetchall()
+            total += len(rows)
+            files.append({
+                "file_key": target_file_key,
+                "kind": kind,
+                "id": item_id,
+                "name": name,
+                "instance_count": len(rows),
+                "instances": [
+                    {"node_id": node_id, "name": node_name, "cache_node_id": cache_node_id or None}
+                    for node_id, node_name, cache_node_id in rows[:limit]
+                ],
+            })
+        files.sort(key=lambda f: -f["instance_count"])
+        return {"key": key, "total": total, "files": files}
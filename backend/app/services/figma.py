@@ -1,36 +1,59 @@
-import requests
 import json
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Iterator, Tuple, Union
 import os
+from app.services.token_pool import TokenPool, PRIORITY_INTERACTIVE
+
+DEFAULT_FIGMA_API_BASE_URL = "https://api.figma.com/v1"
 
 class FigmaService:
-    def __init__(self, token: str):
-        self.base_url = "https://api.figma.com/v1"
-        self.headers = {"X-Figma-Token": token}
+    def __init__(self, token: Union[str, TokenPool], base_url: Optional[str] = None, priority: int = PRIORITY_INTERACTIVE):
+        # FIGMA_API_BASE_URL 可将请求指向本地替身服务 (如 benchmarks/figma_stub.py)
+        self.base_url = (base_url or os.getenv("FIGMA_API_BASE_URL") or DEFAULT_FIGMA_API_BASE_URL).rstrip("/")
+        # 传入单个 token 时等价于只有一个 token 的令牌池
+        self.token_pool = token if isinstance(token, TokenPool) else TokenPool([token])
+        self.priority = priority
+        # 交互式请求最多等待的时间 (秒)，后台任务不限时等待可用 token
+        self.acquire_timeout = 10.0 if priority == PRIORITY_INTERACTIVE else None
+
+    def _get(self, url: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        通过令牌池发起请求。遇到 429 时该 token 进入冷却，换用其他 token 重试，
+        池中每个 token 至多尝试一次。
+        """
+        import requests
+
+        attempts = 0
+        while True:
+            token = self.token_pool.acquire(self.priority, timeout=self.acquire_timeout)
+            try:
+                response = requests.get(url, headers={"X-Figma-Token": token}, params=params)
+            except Exception:
+                self.token_pool.release(token)
+                raise
+            self.token_pool.release(token, response.status_code, response.headers)
+            attempts += 1
+            if response.status_code == 429 and attempts < len(self.token_pool):
+                continue
+            response.raise_for_status()
+            return response.json()
 
     def get_file(self, file_key: str, depth: Optional[int] = None) -> Dict[str, Any]:
         url = f"{self.base_url}/files/{file_key}"
         params = {}
         if depth:
             params["depth"] = depth
-        response = requests.get(url, headers=self.headers, params=params)
-        response.raise_for_status()
-        return response.json()
+        return self._get(url, params)
 
     def get_file_nodes(self, file_key: str, node_ids: str, depth: Optional[int] = None) -> Dict[str, Any]:
         url = f"{self.base_url}/files/{file_key}/nodes"
         params = {"ids": node_ids}
         if depth:
             params["depth"] = depth
-        response = requests.get(url, headers=self.headers, params=params)
-        response.raise_for_status()
-        return response.json()
+        return self._get(url, params)
     
     def get_image_fills(self, file_key: str) -> Dict[str, str]:
         url = f"{self.base_url}/files/{file_key}/images"
-        response = requests.get(url, headers=self.headers)
-        response.raise_for_status()
-        return response.json().get("meta", {}).get("images", {})
+        return self._get(url).get("meta", {}).get("images", {})
 
     def get_node_render_urls(self, file_key: str, node_ids: str, format: str = "png", scale: float = 2.0) -> Dict[str, str]:
         url = f"{self.base_url}/images/{file_key}"
@@ -39,11 +62,11 @@ class FigmaService:
             "format": format,
             "scale": scale
         }
-        response = requests.get(url, headers=self.headers, params=params)
-        response.raise_for_status()
-        return response.json().get("images", {})
+        return self._get(url, params).get("images", {})
     
     def download_image(self, url: str, save_path: str):
+        import requests
+
         response = requests.get(url, stream=True)
         response.raise_for_status()
         os.makedirs(os.path.dirname(save_path), exist_ok=True)
@@ -51,7 +74,8 @@ class FigmaService:
             for chunk in response.iter_content(chunk_size=8192):
                 f.write(chunk)
 
-def simplify_figma_node(node: Dict[str, Any], depth: int = 0, max_depth: Optional[int] = None) -> Optional[Dict[str, Any]]:
+def simplify_figma_node(node: Dict[str, Any], depth: int = 0, max_depth: Optional[int] = None,
+                        style_usages: Optional[Dict[str, List[str]]] = None) -> Optional[Dict[str, Any]]:
     if max_depth is not None and depth > max_depth:
         return None
     
@@ -86,11 +110,17 @@ def simplify_figma_node(node: Dict[str, Any], depth: int = 0, max_depth: Optiona
     if "componentId" in node:
         simple_node["componentId"] = node["componentId"]
 
+    # Style references ({"fill": styleId, "text": styleId, ...}) are collected into the top-level
+    # styleUsages map instead of being repeated on every node
+    if style_usages is not None and node.get("styles"):
+        for style_id in dict.fromkeys(node["styles"].values()):
+            style_usages.setdefault(style_id, []).append(simple_node["id"])
+
     # Children
     if "children" in node:
         children = []
         for child in node["children"]:
-            simplified_child = simplify_figma_node(child, depth + 1, max_depth)
+            simplified_child = simplify_figma_node(child, depth + 1, max_depth, style_usages)
             if simplified_child:
                 children.append(simplified_child)
         if children:
@@ -107,8 +137,11 @@ def process_figma_response(data: Dict[str, Any], max_depth: Optional[int] = None
             "thumbnailUrl": data.get("thumbnailUrl"),
         },
         "nodes": [],
-        "components": data.get("components", {}),
-        "styles": data.get("styles", {}),
+        "components": dict(data.get("components") or {}),
+        "componentSets": dict(data.get("componentSets") or {}),
+        "styles": dict(data.get("styles") or {}),
+        # styleId -> ids of the nodes using it (catalog style usages)
+        "styleUsages": {},
         "globalVars": {"styles": {}} # Placeholder for globalVars if we were to implement full extraction
     }
 
@@ -118,15 +151,35 @@ def process_figma_response(data: Dict[str, Any], max_depth: Optional[int] = None
         # We process the children of the document (Canvases/Pages)
         if "children" in root:
              for child in root["children"]:
-                 simplified = simplify_figma_node(child, 0, max_depth)
+                 simplified = simplify_figma_node(child, 0, max_depth, result["styleUsages"])
                  if simplified:
                      result["nodes"].append(simplified)
     elif "nodes" in data:
         # GetFileNodesResponse
         for node_id, node_data in data["nodes"].items():
+            if not node_data:
+                continue
+            # 节点响应中的组件 / 样式定义位于每个 nodes[id] 下，合并到顶层
+            for field in ("components", "componentSets", "styles"):
+                result[field].update(node_data.get(field) or {})
             if "document" in node_data:
-                simplified_node = simplify_figma_node(node_data["document"], 0, max_depth)
+                simplified_node = simplify_figma_node(node_data["document"], 0, max_depth, result["styleUsages"])
                 if simplified_node:
                     result["nodes"].append(simplified_node)
     
     return result
+
+def iter_simplified_nodes(processed_data: Dict[str, Any]) -> Iterator[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+    """
+    深度优先遍历 process_figma_response 输出中的节点。
+    产出 (node, ancestors)，ancestors 为从顶层到父节点的节点列表。
+    """
+    stack = [(node, []) for node in reversed(processed_data.get("nodes") or [])]
+    while stack:
+        node, ancestors = stack.pop()
+        yield node, ancestors
+        children = node.get("children")
+        if children:
+            child_ancestors = ancestors + [node]
+            for child in reversed(children):
+                stack.append((child, child_ancestors))
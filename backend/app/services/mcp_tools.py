@@ -2,23 +2,29 @@ import json
 import logging
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
 from app.repository import FigmaDataRepository
+from app.services.assets import format_optimization, optimize_assets
 from app.services.figma import FigmaService, process_figma_response
+from app.services.token_pool import TokenPool, PRIORITY_INTERACTIVE
 
 logger = logging.getLogger(__name__)
 
 def get_figma_data_tool(
     repo: FigmaDataRepository,
-    token: str,
+    token: Union[str, TokenPool],
     file_key: str,
     node_id: str = None,
     depth: int = None,
     force_refresh: bool = False,
+    priority: int = PRIORITY_INTERACTIVE,
 ):
     """
     获取 Figma 数据。
     优先查库/缓存，若无则调用 Figma API 并缓存。
+    token 可以是单个 token 或令牌池；后台同步应传入 priority=PRIORITY_BACKGROUND。
     """
     # Check cache
     cached_item = repo.get_data(file_key, node_id)
@@ -44,7 +50,7 @@ def get_figma_data_tool(
             file=sys.stderr,
         )
         logger.info(f"Cache miss for {file_key} {node_id}")
-    service = FigmaService(token)
+    service = FigmaService(token, priority=priority)
     
     try:
         if node_id:
@@ -55,46 +61,167 @@ def get_figma_data_tool(
             
         # Process
         processed_data = process_figma_response(raw_data, depth)
-        
-        meta = processed_data.get("metadata", {}) if isinstance(processed_data, dict) else {}
-        name = meta.get("name")
-        last_modified_str = meta.get("lastModified")
-        last_modified_dt = None
-        if isinstance(last_modified_str, str):
-            try:
-                # Example: 2026-01-14T05:57:11Z
-                last_modified_dt = datetime.strptime(last_modified_str, "%Y-%m-%dT%H:%M:%SZ")
-            except Exception:
-                last_modified_dt = None
-        
-        repo.save_data(
-            file_key=file_key,
-            node_id=node_id,
-            data=json.dumps(processed_data),
-            name=name,
-            depth=depth,
-            last_modified=last_modified_dt
-        )
-        
+        _save_processed(repo, file_key, node_id, depth, processed_data)
         return processed_data
     except Exception as e:
         logger.error(f"Error fetching figma data: {e}")
         raise e
 
+def _save_processed(repo: FigmaDataRepository, file_key: str, node_id: Optional[str], depth: Optional[int], processed_data: Dict[str, Any]):
+    meta = processed_data.get("metadata", {}) if isinstance(processed_data, dict) else {}
+    name = meta.get("name")
+    last_modified_str = meta.get("lastModified")
+    last_modified_dt = None
+    if isinstance(last_modified_str, str):
+        try:
+            # Example: 2026-01-14T05:57:11Z
+            last_modified_dt = datetime.strptime(last_modified_str, "%Y-%m-%dT%H:%M:%SZ")
+        except Exception:
+            last_modified_dt = None
+
+    repo.save_data(
+        file_key=file_key,
+        node_id=node_id,
+        data=json.dumps(processed_data),
+        name=name,
+        depth=depth,
+        last_modified=last_modified_dt
+    )
+
+def _normalize_batch_item(item: Any) -> Tuple[str, Optional[str], Optional[int]]:
+    if isinstance(item, dict):
+        file_key, node_id, depth = item.get("file_key"), item.get("node_id"), item.get("depth")
+    else:
+        values = list(item) + [None, None]
+        file_key, node_id, depth = values[0], values[1], values[2]
+    if not file_key:
+        raise ValueError(f"file_key is required: {item}")
+    return file_key, node_id or None, int(depth) if depth is not None else None
+
+def _single_node_response(raw_data: Dict[str, Any], node_id: str) -> Optional[Dict[str, Any]]:
+    """从合并请求的 nodes 响应中拆出单个节点，保持 GetFileNodesResponse 结构。"""
+    nodes = raw_data.get("nodes") or {}
+    # Figma 响应中的节点 id 为 "1:2" 形式，兼容 URL 中的 "1-2" 写法
+    node_data = nodes.get(node_id) or nodes.get(node_id.replace("-", ":"))
+    if not node_data:
+        return None
+    single = {k: v for k, v in raw_data.items() if k != "nodes"}
+    single["nodes"] = {node_id: node_data}
+    return single
+
+def get_figma_data_batch_tool(
+    repo: FigmaDataRepository,
+    token: Union[str, TokenPool],
+    items: List[Any],
+    force_refresh: bool = False,
+    max_workers: int = 4,
+    priority: int = PRIORITY_INTERACTIVE,
+) -> List[Dict[str, Any]]:
+    """
+    批量获取 Figma 数据。
+    items 为 (file_key, node_id, depth) 列表 (元组或字典)。
+    命中缓存的一次性返回；未命中的同一文件同一深度的节点合并为一次 get_file_nodes 请求，
+    不同文件并发请求，每个节点单独写入缓存。结果按输入顺序返回。
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    # (file_key, depth) -> [(index, node_id)]
+    misses: Dict[Tuple[str, Optional[int]], List[Tuple[int, Optional[str]]]] = {}
+
+    normalized: List[Tuple[int, str, Optional[str], Optional[int]]] = []
+    for index, item in enumerate(items):
+        try:
+            normalized.append((index, *_normalize_batch_item(item)))
+        except Exception as e:
+            results[index] = {"file_key": None, "node_id": None, "depth": None, "error": str(e)}
+
+    # 一次批量读取所有缓存条目 (MySQL 下为单条 IN 查询)
+    cached = {} if force_refresh else repo.get_many([(file_key, node_id) for _, file_key, node_id, _ in normalized])
+    for index, file_key, node_id, depth in normalized:
+        cached_item = cached.get((file_key, node_id))
+        if cached_item:
+            results[index] = {
+                "file_key": file_key, "node_id": node_id, "depth": depth,
+                "cache": "HIT", "data": json.loads(cached_item.data),
+            }
+        else:
+            misses.setdefault((file_key, depth), []).append((index, node_id))
+
+    hit_count = sum(1 for r in results if r and r.get("cache") == "HIT")
+    print(
+        f"\n{'='*50}\n[Figma MCP] 批量获取 (Batch)\nHIT: {hit_count}  MISS: {sum(len(v) for v in misses.values())}  "
+        f"请求数: {len(misses)}\n{'='*50}\n",
+        file=sys.stderr,
+    )
+
+    def fetch(file_key: str, depth: Optional[int], node_ids: List[Optional[str]]) -> Dict[str, Any]:
+        service = FigmaService(token, priority=priority)
+        fetched: Dict[str, Any] = {}
+        ids = sorted({n for n in node_ids if n})
+        if ids:
+            fetched["nodes"] = service.get_file_nodes(file_key, ",".join(ids), depth)
+        if any(n is None for n in node_ids):
+            fetched["file"] = service.get_file(file_key, depth)
+        return fetched
+
+    if misses:
+        # 仅在线程中发起 HTTP 请求，仓储读写 (如 SQLAlchemy Session) 保持在当前线程
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(misses)))) as pool:
+            futures = {
+                pool.submit(fetch, file_key, depth, [n for _, n in entries]): (file_key, depth)
+                for (file_key, depth), entries in misses.items()
+            }
+            for future in as_completed(futures):
+                file_key, depth = futures[future]
+                entries = misses[(file_key, depth)]
+                try:
+                    fetched = future.result()
+                except Exception as e:
+                    logger.error(f"Error fetching figma data for {file_key}: {e}")
+                    for index, node_id in entries:
+                        results[index] = {"file_key": file_key, "node_id": node_id, "depth": depth, "error": str(e)}
+                    continue
+
+                processed_by_node: Dict[Optional[str], Dict[str, Any]] = {}
+                for index, node_id in entries:
+                    result = {"file_key": file_key, "node_id": node_id, "depth": depth, "cache": "MISS"}
+                    if node_id not in processed_by_node:
+                        raw_data = fetched["file"] if node_id is None else _single_node_response(fetched["nodes"], node_id)
+                        if raw_data is None:
+                            result["error"] = f"Node not found: {node_id}"
+                            results[index] = result
+                            continue
+                        processed_data = process_figma_response(raw_data, depth)
+                        try:
+                            _save_processed(repo, file_key, node_id, depth, processed_data)
+                        except Exception as e:
+                            # 写缓存失败不影响返回已获取的数据
+                            logger.error(f"Error caching figma data for {file_key} {node_id}: {e}")
+                            result["cache_error"] = str(e)
+                        processed_by_node[node_id] = processed_data
+                    result["data"] = processed_by_node[node_id]
+                    results[index] = result
+
+    return results
+
 def download_figma_images_tool(
-    token: str,
+    token: Union[str, TokenPool],
     file_key: str,
     nodes: list, 
     local_path: str,
-    png_scale: float = 2.0
+    png_scale: float = 2.0,
+    optimize: bool = False,
+    webp: bool = False,
 ):
     """
     下载 Figma 图片。
     支持 node renders 和 image fills。
+    optimize=True 时在进程池中对下载结果做无损优化 (SVG 精简 / PNG 重压缩)，webp=True 时额外输出 WebP；
+    只指定 webp=True 时不改动原文件，仅为 PNG 输出 WebP。PNG 重压缩沿用原有滤波方式，收益通常很小。
     """
     service = FigmaService(token)
     
     results = []
+    downloaded = []
     
     # 1. Handle Node Renders (nodeId)
     render_nodes = [n for n in nodes if 'nodeId' in n and not n.get('imageRef')]
@@ -115,6 +242,7 @@ def download_figma_images_tool(
                         full_path = os.path.join(local_path, file_name)
                         service.download_image(urls[node_id], full_path)
                         results.append(f"Downloaded PNG: {file_name}")
+                        downloaded.append(full_path)
                     else:
                         results.append(f"Failed to get URL for {node_id}")
             except Exception as e:
@@ -132,6 +260,7 @@ def download_figma_images_tool(
                         full_path = os.path.join(local_path, file_name)
                         service.download_image(urls[node_id], full_path)
                         results.append(f"Downloaded SVG: {file_name}")
+                        downloaded.append(full_path)
                     else:
                         results.append(f"Failed to get URL for {node_id}")
             except Exception as e:
@@ -149,9 +278,18 @@ def download_figma_images_tool(
                     full_path = os.path.join(local_path, file_name)
                     service.download_image(fill_urls[image_ref], full_path)
                     results.append(f"Downloaded Image Fill: {file_name}")
+                    downloaded.append(full_path)
                 else:
                     results.append(f"Image Ref not found: {image_ref}")
         except Exception as e:
             results.append(f"Error downloading Image Fills: {e}")
 
+    # 3. Optimize downloaded assets (CPU bound, runs on a process pool)
+    if not optimize:
+        # 仅输出 WebP 时只处理 PNG，不改动原文件
+        downloaded = [path for path in downloaded if not path.lower().endswith(".svg")] if webp else []
+    if downloaded:
+        for result in optimize_assets(downloaded, webp=webp, optimize=optimize):
+            results.append(format_optimization(result))
+
     return "\n".join(results)
@@ -0,0 +1,155 @@
+import json
+import re
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+from app.services.figma import iter_simplified_nodes
+from app.services.sqlite_index import SQLiteIndex
+
+_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS node_fts USING fts5(
+    name,
+    characters,
+    type,
+    file_key UNINDEXED,
+    cache_node_id UNINDEXED,
+    node_id UNINDEXED,
+    path UNINDEXED,
+    bbox UNINDEXED,
+    tokenize = 'unicode61'
+);
+-- 每个缓存条目在 node_fts 中占用的连续 rowid 区间。FTS5 的 UNINDEXED 列无法走索引，
+-- 按 file_key / cache_node_id 删除会扫描整个全文索引，因此通过该表按 rowid 区间删除
+CREATE TABLE IF NOT EXISTS node_fts_docs (
+    file_key TEXT NOT NULL,
+    cache_node_id TEXT NOT NULL,
+    first_rowid INTEGER NOT NULL,
+    last_rowid INTEGER NOT NULL,
+    PRIMARY KEY (file_key, cache_node_id)
+);
+CREATE INDEX IF NOT EXISTS idx_node_fts_docs_last ON node_fts_docs(last_rowid);
+"""
+
+
+def _to_fts_query(query: str) -> Optional[str]:
+    """
+    将自由文本转换为 FTS5 查询：每个词做前缀匹配，多个词之间为 AND。
+    例如 "checkout btn" -> "checkout"* "btn"*
+    """
+    terms = [t for t in re.split(r"[\s\"'()*:^+\-]+", query) if t]
+    if not terms:
+        return None
+    return " ".join(f'"{t}"*' for t in terms)
+
+
+class NodeSearchIndex(SQLiteIndex):
+    """
+    基于 SQLite FTS5 的节点全文索引，覆盖节点的 name / characters / type。
+    每个缓存条目 (file_key, cache_node_id) 在保存时整体替换其索引行，按 node_fts_docs 中记录的 rowid 区间删除。
+    """
+
+    SCHEMA = _SCHEMA
+
+    def _index_document(self, conn: sqlite3.Connection, file_key: str, cache_node_id: Optional[str], data: Dict[str, Any]):
+        rows = []
+        for node, ancestors in iter_simplified_nodes(data):
+            rows.append((
+                node.get("name") or "",
+                node.get("characters") or "",
+                node.get("type") or "",
+                file_key,
+                cache_node_id or "",
+                node.get("id"),
+                json.dumps([{"id": a.get("id"), "name": a.get("name")} for a in ancestors], ensure_ascii=False),
+                json.dumps(node.get("absoluteBoundingBox")) if node.get("absoluteBoundingBox") else None,
+            ))
+        self._delete_document(conn, file_key, cache_node_id or "")
+        if not rows:
+            return
+        row = conn.execute("SELECT MAX(last_rowid) FROM node_fts_docs").fetchone()
+        first = (row[0] or 0) + 1
+        conn.executemany(
+            "INSERT INTO node_fts (rowid, name, characters, type, file_key, cache_node_id, node_id, path, bbox) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(first + i,) + r for i, r in enumerate(rows)],
+        )
+        conn.execute(
+            "INSERT INTO node_fts_docs (file_key, cache_node_id, first_rowid, last_rowid) VALUES (?, ?, ?, ?)",
+            (file_key, cache_node_id or "", first, first + len(rows) - 1),
+        )
+
+    def remove_document(self, file_key: str, cache_node_id: Optional[str]):
+        conn = self._connect()
+        with conn:
+            self._delete_document(conn, file_key, cache_node_id or "")
+
+    def _delete_document(self, conn, file_key: str, cache_node_id: str):
+        row = conn.execute(
+            "SELECT first_rowid, last_rowid FROM node_fts_docs WHERE file_key = ? AND cache_node_id = ?",
+            (file_key, cache_node_id),
+        ).fetchone()
+        if row is None:
+            return
+        conn.execute("DELETE FROM node_fts WHERE rowid BETWEEN ? AND ?", row)
+        conn.execute("DELETE FROM node_fts_docs WHERE file_key = ? AND cache_node_id = ?", (file_key, cache_node_id))
+
+    def _migrate(self, conn):
+        # 旧索引文件没有 node_fts_docs：一次性按条目汇总 rowid 区间 (每个条目在同一事务中连续插入)
+        if conn.execute("SELECT 1 FROM node_fts_docs LIMIT 1").fetchone() is None:
+            with conn:
+                conn.execute(
+                    "INSERT INTO node_fts_docs (file_key, cache_node_id, first_rowid, last_rowid) "
+                    "SELECT file_key, cache_node_id, MIN(rowid), MAX(rowid) FROM node_fts GROUP BY file_key, cache_node_id"
+                )
+
+    def search(
+        self,
+        query: str,
+        file_key: Optional[str] = None,
+        node_type: Optional[str] = None,
+        limit: int = 20,
+    ) -> List[Dict[str, Any]]:
+        fts_query = _to_fts_query(query)
+        if not fts_query:
+            return []
+
+        sql = (
+            "SELECT file_key, cache_node_id, node_id, name, type, characters, path, bbox "
+            "FROM node_fts WHERE node_fts MATCH ?"
+        )
+        params: List[Any] = [fts_query]
+        if file_key:
+            sql += " AND file_key = ?"
+            params.append(file_key)
+        if node_type:
+            sql += " AND type = ?"
+            params.append(node_type.upper())
+        # 同一节点可能同时存在于整文件缓存和节点缓存中，多取一些再去重
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(limit * 3)
+
+        rows = self._connect().execute(sql, params).fetchall()
+
+        # 同一节点去重时优先保留整文件缓存 (cache_node_id 为空) 的行：节点缓存中的祖先路径只到缓存的子树根为止
+        best: Dict[Any, Any] = {}
+        for row in rows:
+            key = (row[0], row[2])
+            if key not in best or (best[key][1] and not row[1]):
+                best[key] = row
+
+        results = []
+        for row_file_key, cache_node_id, node_id, name, node_type_, characters, path, bbox in list(best.values())[:limit]:
+            ancestors = json.loads(path) if path else []
+            results.append({
+                "file_key": row_file_key,
+                "node_id": node_id,
+                "name": name,
+                "type": node_type_,
+                "characters": characters or None,
+                # path 相对于 cache_node_id 对应的缓存条目 (整文件条目时为完整路径)
+                "path": [a["name"] for a in ancestors],
+                "path_ids": [a["id"] for a in ancestors],
+                "absoluteBoundingBox": json.loads(bbox) if bbox else None,
+                "cache_node_id": cache_node_id or None,
+            })
+        return results
@@ -0,0 +1,261 @@
+import math
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+from app.services.figma import iter_simplified_nodes
+from app.services.sqlite_index import SQLiteIndex
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS node_boxes (
+    id INTEGER PRIMARY KEY,
+    file_key TEXT NOT NULL,
+    cache_node_id TEXT NOT NULL,
+    node_id TEXT NOT NULL,
+    parent_id TEXT,
+    page_id TEXT,
+    name TEXT,
+    type TEXT,
+    x REAL,
+    y REAL,
+    width REAL,
+    height REAL
+);
+CREATE INDEX IF NOT EXISTS idx_node_boxes_entry ON node_boxes (file_key, cache_node_id);
+CREATE INDEX IF NOT EXISTS idx_node_boxes_node ON node_boxes (file_key, node_id);
+CREATE INDEX IF NOT EXISTS idx_node_boxes_parent ON node_boxes (file_key, parent_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS node_rtree USING rtree(id, min_x, max_x, min_y, max_y);
+"""
+
+def _box_gap(a: Dict[str, float], b: Dict[str, float]) -> float:
+    """两个矩形边缘之间的最短距离，相交时为 0。"""
+    dx = max(b["min_x"] - a["max_x"], a["min_x"] - b["max_x"], 0.0)
+    dy = max(b["min_y"] - a["max_y"], a["min_y"] - b["max_y"], 0.0)
+    return math.hypot(dx, dy)
+
+
+def _direction(a: Dict[str, float], b: Dict[str, float]) -> str:
+    """b 相对 a 的方位 (以中心点判断)。"""
+    dx = (b["min_x"] + b["max_x"] - a["min_x"] - a["max_x"]) / 2
+    dy = (b["min_y"] + b["max_y"] - a["min_y"] - a["max_y"]) / 2
+    if abs(dx) >= abs(dy):
+        return "right" if dx > 0 else "left"
+    return "below" if dy > 0 else "above"
+
+
+class SpatialIndex(SQLiteIndex):
+    """
+    基于 SQLite R*Tree 的节点空间索引，键为 absoluteBoundingBox。
+    每个缓存条目 (file_key, cache_node_id) 在保存时整体替换其索引行。
+    R*Tree 以 32 位浮点存储坐标，仅用于候选过滤，精确坐标保存在 node_boxes 中。
+    各页面 (CANVAS) 共用同一坐标空间，因此每个节点同时记录所在页面 page_id，区域查询可按页面过滤。
+    节点缓存条目中不含页面信息，其 page_id 取自同一文件整文件条目中的对应节点。
+    """
+
+    SCHEMA = _SCHEMA
+
+    _COLUMNS = "b.node_id, b.parent_id, b.page_id, b.name, b.type, b.x, b.y, b.width, b.height "
+    # 区域查询以 R*Tree 驱动；按节点查询以 node_boxes 索引驱动
+    _SELECT_BY_REGION = "SELECT " + _COLUMNS + "FROM node_rtree r CROSS JOIN node_boxes b ON b.id = r.id "
+    _SELECT_BY_NODE = "SELECT " + _COLUMNS + "FROM node_boxes b "
+
+    def _delete_entry(self, conn, file_key: str, cache_node_id: Optional[str]):
+        conn.execute(
+            "DELETE FROM node_rtree WHERE id IN "
+            "(SELECT id FROM node_boxes WHERE file_key = ? AND cache_node_id = ?)",
+            (file_key, cache_node_id or ""),
+        )
+        conn.execute(
+            "DELETE FROM node_boxes WHERE file_key = ? AND cache_node_id = ?",
+            (file_key, cache_node_id or ""),
+        )
+
+    def _migrate(self, conn):
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(node_boxes)")}
+        if "page_id" not in columns:
+            # 旧索引中的行 page_id 为空，可通过重建索引补齐
+            conn.execute("ALTER TABLE node_boxes ADD COLUMN page_id TEXT")
+
+    def _page_of(self, conn, file_key: str, node_id: Optional[str]) -> Optional[str]:
+        row = conn.execute(
+            "SELECT page_id FROM node_boxes WHERE file_key = ? AND node_id = ? AND cache_node_id = '' LIMIT 1",
+            (file_key, node_id),
+        ).fetchone()
+        return row[0] if row else None
+
+    def _fill_entry_pages(self, conn, file_key: str):
+        """为先于整文件条目缓存的节点条目补齐 page_id：先按整文件中的同一节点，再沿父节点向下传递。"""
+        conn.execute(
+            "UPDATE node_boxes SET page_id = ("
+            "SELECT f.page_id FROM node_boxes f WHERE f.file_key = node_boxes.file_key "
+            "AND f.node_id = node_boxes.node_id AND f.cache_node_id = '' LIMIT 1) "
+            "WHERE file_key = ? AND cache_node_id != '' AND page_id IS NULL",
+            (file_key,),
+        )
+        while True:
+            cursor = conn.execute(
+                "UPDATE node_boxes SET page_id = ("
+                "SELECT p.page_id FROM node_boxes p WHERE p.file_key = node_boxes.file_key "
+                "AND p.cache_node_id = node_boxes.cache_node_id AND p.node_id = node_boxes.parent_id "
+                "AND p.page_id IS NOT NULL LIMIT 1) "
+                "WHERE file_key = ? AND cache_node_id != '' AND page_id IS NULL AND EXISTS ("
+                "SELECT 1 FROM node_boxes p WHERE p.file_key = node_boxes.file_key "
+                "AND p.cache_node_id = node_boxes.cache_node_id AND p.node_id = node_boxes.parent_id "
+                "AND p.page_id IS NOT NULL)",
+                (file_key,),
+            )
+            if cursor.rowcount <= 0:
+                break
+
+    def _index_document(self, conn: sqlite3.Connection, file_key: str, cache_node_id: Optional[str], data: Dict[str, Any]):
+        nodes = []
+        for node, ancestors in iter_simplified_nodes(data):
+            box = node.get("absoluteBoundingBox")
+            if not box or box.get("x") is None or box.get("y") is None:
+                continue
+            page = ancestors[0] if ancestors else node
+            nodes.append((node, ancestors[-1].get("id") if ancestors else None, page, box))
+
+        self._delete_entry(conn, file_key, cache_node_id)
+        # 整文件条目的顶层节点为页面；节点条目的顶层节点沿用整文件条目中记录的页面
+        page_ids: Dict[Optional[str], Optional[str]] = {}
+        for node, parent_id, page, box in nodes:
+            top_id = page.get("id")
+            if top_id not in page_ids:
+                if page.get("type") == "CANVAS":
+                    page_ids[top_id] = top_id
+                else:
+                    page_ids[top_id] = self._page_of(conn, file_key, top_id) if cache_node_id else None
+            x, y = float(box["x"]), float(box["y"])
+            width, height = float(box.get("width") or 0), float(box.get("height") or 0)
+            cursor = conn.execute(
+                "INSERT INTO node_boxes (file_key, cache_node_id, node_id, parent_id, page_id, name, type, x, y, width, height) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (file_key, cache_node_id or "", node.get("id"), parent_id, page_ids[top_id], node.get("name"),
+                 node.get("type"), x, y, width, height),
+            )
+            conn.execute(
+                "INSERT INTO node_rtree VALUES (?, ?, ?, ?, ?)",
+                (cursor.lastrowid, x, x + width, y, y + height),
+            )
+        if not cache_node_id:
+            self._fill_entry_pages(conn, file_key)
+
+    def remove_document(self, file_key: str, cache_node_id: Optional[str]):
+        conn = self._connect()
+        with conn:
+            self._delete_entry(conn, file_key, cache_node_id)
+
+    @staticmethod
+    def _row_to_dict(row) -> Dict[str, Any]:
+        node_id, parent_id, page_id, name, node_type, x, y, width, height = row
+        return {
+            "node_id": node_id,
+            "parent_id": parent_id,
+            "page_id": page_id,
+            "name": name,
+            "type": node_type,
+            "absoluteBoundingBox": {"x": x, "y": y, "width": width, "height": height},
+        }
+
+    @staticmethod
+    def _edges(item: Dict[str, Any]) -> Dict[str, float]:
+        box = item["absoluteBoundingBox"]
+        return {
+            "min_x": box["x"], "max_x": box["x"] + box["width"],
+            "min_y": box["y"], "max_y": box["y"] + box["height"],
+        }
+
+    def _entry_filter(self, file_key: str, cache_node_id: Optional[str]):
+        sql = "b.file_key = ?"
+        params: List[Any] = [file_key]
+        if cache_node_id is not None:
+            sql += " AND b.cache_node_id = ?"
+            params.append(cache_node_id or "")
+        return sql, params
+
+    def query_region(
+        self,
+        file_key: str,
+        x: float,
+        y: float,
+        width: float = 0,
+        height: float = 0,
+        mode: str = "intersects",
+        cache_node_id: Optional[str] = None,
+        node_type: Optional[str] = None,
+        limit: int = 100,
+        page_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        mode = "intersects": 与区域相交的节点 (width/height 为 0 时即点查询)
+        mode = "contains": 完全位于区域内的节点
+        各页面坐标空间重叠，未指定 page_id 时结果可能来自多个页面 (见各结果的 page_id)。
+        结果按面积从小到大排序，点查询时最内层节点排在最前。
+        同一节点同时出现在整文件与节点缓存条目中时，取整文件条目中的行 (带父节点与页面)。
+        """
+        x2, y2 = x + width, y + height
+        # R*Tree 条件放宽少许以容纳 32 位浮点误差，再用精确坐标判断
+        slack = 0.01
+        region = "r.min_x <= ? AND r.max_x >= ? AND r.min_y <= ? AND r.max_y >= ?"
+        params: List[Any] = [x2 + slack, x - slack, y2 + slack, y - slack]
+        if mode == "contains":
+            region += " AND b.x >= ? AND b.x + b.width <= ? AND b.y >= ? AND b.y + b.height <= ?"
+            params += [x, x2, y, y2]
+        else:
+            region += " AND b.x <= ? AND b.x + b.width >= ? AND b.y <= ? AND b.y + b.height >= ?"
+            params += [x2, x, y2, y]
+        entry_sql, entry_params = self._entry_filter(file_key, cache_node_id)
+        sql = self._SELECT_BY_REGION + f"WHERE {region} AND {entry_sql}"
+        params += entry_params
+        if node_type:
+            sql += " AND b.type = ?"
+            params.append(node_type.upper())
+        if page_id:
+            sql += " AND b.page_id = ?"
+            params.append(page_id)
+        sql += " ORDER BY b.width * b.height ASC, b.cache_node_id != ''"
+
+        results = []
+        seen = set()
+        for row in self._connect().execute(sql, params):
+            if row[0] in seen:
+                continue
+            seen.add(row[0])
+            results.append(self._row_to_dict(row))
+            if len(results) >= limit:
+                break
+        return results
+
+    def nearest_sibling(self, file_key: str, node_id: str, cache_node_id: Optional[str] = None,
+                        limit: int = 1) -> List[Dict[str, Any]]:
+        """返回与 node_id 同父节点、边缘距离最近的兄弟节点 (含距离与方位)。"""
+        entry_sql, entry_params = self._entry_filter(file_key, cache_node_id)
+        conn = self._connect()
+        # 节点缓存条目的顶层节点没有父节点记录，优先取带 parent_id 的行 (如整文件条目)
+        row = conn.execute(
+            self._SELECT_BY_NODE + f"WHERE b.node_id = ? AND {entry_sql} ORDER BY b.parent_id IS NULL LIMIT 1",
+            [node_id] + entry_params,
+        ).fetchone()
+        if row is None:
+            return []
+        target = self._row_to_dict(row)
+        if target["parent_id"] is None:
+            return []
+        rows = conn.execute(
+            self._SELECT_BY_NODE + f"WHERE b.parent_id = ? AND b.node_id != ? AND {entry_sql}",
+            [target["parent_id"], node_id] + entry_params,
+        ).fetchall()
+
+        target_edges = self._edges(target)
+        siblings = {}
+        for sibling_row in rows:
+            sibling = self._row_to_dict(sibling_row)
+            siblings.setdefault(sibling["node_id"], sibling)
+        ranked = sorted(siblings.values(), key=lambda s: _box_gap(target_edges, self._edges(s)))
+        results = []
+        for sibling in ranked[:limit]:
+            edges = self._edges(sibling)
+            sibling["distance"] = round(_box_gap(target_edges, edges), 4)
+            sibling["direction"] = _direction(target_edges, edges)
+            results.append(sibling)
+        return results
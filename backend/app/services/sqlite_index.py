@@ -0,0 +1,79 @@
+import logging
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 已初始化表结构的 (索引类, 文件路径)，避免每次打开连接都执行 DDL
+_initialized = set()
+_init_lock = threading.Lock()
+# 每个线程复用自己的连接，查询无需重复打开文件
+_local = threading.local()
+
+
+class SQLiteIndex:
+    """
+    缓存附属索引的基类。每个子类声明自己的 SCHEMA，
+    并实现 _index_document / remove_document，由仓储在 save_data 后调用。
+    """
+
+    SCHEMA = ""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+
+    def _connect(self) -> sqlite3.Connection:
+        connections = getattr(_local, "connections", None)
+        if connections is None:
+            connections = _local.connections = {}
+        conn = connections.get(self.db_path)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            connections[self.db_path] = conn
+        key = (type(self).__name__, self.db_path)
+        if key not in _initialized:
+            with _init_lock:
+                if key not in _initialized:
+                    conn.executescript(self.SCHEMA)
+                    self._migrate(conn)
+                    _initialized.add(key)
+        return conn
+
+    def _migrate(self, conn: sqlite3.Connection):
+        """为旧版本创建的索引文件补充新增的列等，子类按需实现。"""
+
+    def _index_document(self, conn: sqlite3.Connection, file_key: str, cache_node_id: Optional[str], data: Dict[str, Any]):
+        """在调用方开启的事务中写入一个条目的索引行。"""
+        raise NotImplementedError
+
+    def index_document(self, file_key: str, cache_node_id: Optional[str], data: Dict[str, Any]):
+        conn = self._connect()
+        with conn:
+            self._index_document(conn, file_key, cache_node_id, data)
+
+    def index_documents(self, documents: List[Tuple[str, Optional[str], Dict[str, Any]]]):
+        """
+        批量写入 (file_key, cache_node_id, data)，整批共用一个事务 (批量导入时事务提交是主要开销)。
+        批内某个条目失败时整批回滚并改为逐条写入，只跳过失败的条目。
+        """
+        if not documents:
+            return
+        conn = self._connect()
+        try:
+            with conn:
+                for file_key, cache_node_id, data in documents:
+                    self._index_document(conn, file_key, cache_node_id, data)
+            return
+        except Exception:
+            if len(documents) == 1:
+                raise
+        for file_key, cache_node_id, data in documents:
+            try:
+                self.index_document(file_key, cache_node_id, data)
+            except Exception as e:
+                logger.error(f"Failed to update {type(self).__name__} for {file_key} {cache_node_id}: {e}")
+
+    def remove_document(self, file_key: str, cache_node_id: Optional[str]):
+        raise NotImplementedError
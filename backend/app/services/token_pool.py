@@ -0,0 +1,320 @@
+import hashlib
+import os
+import threading
+import time
+from typing import Dict, List, Mapping, Optional
+
+from app.services.sqlite_index import SQLiteIndex
+
+# 调度优先级：交互式 MCP 调用优先于后台同步任务
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+# 429 未携带 Retry-After 时的默认冷却时间 (秒)
+DEFAULT_COOLDOWN = 60.0
+# 共享状态下跨进程没有通知机制，等待中的请求按该间隔 (秒) 重新读取共享状态
+SHARED_POLL_INTERVAL = 0.5
+# 等待中的交互式请求超过该时间 (秒) 未刷新视为已退出 (如进程崩溃)
+WAITER_TTL = 5.0
+
+
+class _TokenState:
+    def __init__(self, token: str):
+        self.token = token
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at: Optional[float] = None
+        self.cooldown_until = 0.0
+        self.in_flight = 0
+        self.requests = 0
+        self.throttled = 0
+
+
+class SharedTokenState(SQLiteIndex):
+    """
+    多个进程 (MCP Server 与管理后台) 共用的令牌额度状态，存放在索引目录下的 token_pool.db。
+
+    记录每个 token 的剩余额度、重置时间与冷却期，以及正在等待的交互式请求，
+    使后台同步能看到其他进程中的 429 冷却与交互式等待并为其让行。
+    token 只以哈希形式保存，时间使用 Unix 时间戳。
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS token_state (
+        token_hash TEXT PRIMARY KEY,
+        rate_limit INTEGER,
+        remaining INTEGER,
+        reset_at REAL,
+        cooldown_until REAL NOT NULL DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS interactive_waiters (
+        waiter TEXT PRIMARY KEY,
+        seen REAL NOT NULL
+    );
+    """
+
+    @staticmethod
+    def _hash(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()[:32]
+
+    def load(self, states: List["_TokenState"]):
+        """用共享状态覆盖本进程记录的额度、重置时间与冷却期。"""
+        by_hash = {self._hash(s.token): s for s in states}
+        rows = self._connect().execute(
+            f"SELECT token_hash, rate_limit, remaining, reset_at, cooldown_until FROM token_state "
+            f"WHERE token_hash IN ({','.join('?' * len(by_hash))})",
+            list(by_hash),
+        ).fetchall()
+        offset = time.monotonic() - time.time()
+        for token_hash, limit, remaining, reset_at, cooldown_until in rows:
+            state = by_hash[token_hash]
+            state.limit, state.remaining = limit, remaining
+            state.reset_at = reset_at + offset if reset_at is not None else None
+            state.cooldown_until = cooldown_until + offset
+
+    def store(self, state: "_TokenState"):
+        offset = time.time() - time.monotonic()
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO token_state (token_hash, rate_limit, remaining, reset_at, cooldown_until) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    self._hash(state.token), state.limit, state.remaining,
+                    state.reset_at + offset if state.reset_at is not None else None,
+                    state.cooldown_until + offset if state.cooldown_until else 0,
+                ),
+            )
+
+    def consume(self, token: str):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "UPDATE token_state SET remaining = remaining - 1 WHERE token_hash = ? AND remaining IS NOT NULL",
+                (self._hash(token),),
+            )
+
+    def set_waiting(self, waiter: str, waiting: bool):
+        conn = self._connect()
+        with conn:
+            if waiting:
+                conn.execute("INSERT OR REPLACE INTO interactive_waiters (waiter, seen) VALUES (?, ?)",
+                             (waiter, time.time()))
+            else:
+                conn.execute("DELETE FROM interactive_waiters WHERE waiter = ?", (waiter,))
+
+    def interactive_waiting(self) -> bool:
+        row = self._connect().execute(
+            "SELECT 1 FROM interactive_waiters WHERE seen > ? LIMIT 1", (time.time() - WAITER_TTL,)
+        ).fetchone()
+        return row is not None
+
+
+def _header_int(headers: Mapping[str, str], *names: str) -> Optional[int]:
+    for name in names:
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            return int(float(value))
+        except ValueError:
+            continue
+    return None
+
+
+class TokenPool:
+    """
+    多个 Figma Access Token 组成的令牌池。
+
+    - 每次请求选择未处于冷却期、剩余额度最多、并发与累计请求最少的 token
+    - 根据响应头 (X-RateLimit-Remaining / X-RateLimit-Limit / X-RateLimit-Reset) 跟踪剩余额度
+    - 收到 429 时按 Retry-After 将 token 暂时移出调度
+    - 后台任务不占用额度低于 background_reserve 比例的 token，且在有交互式请求等待时让行
+
+    未传入 shared 时以上状态只在本进程内有效；传入 SharedTokenState 后额度、冷却期与交互式等待
+    在使用同一状态文件的进程之间共享 (见 get_token_pool)。
+    """
+
+    def __init__(self, tokens: List[str], background_reserve: float = 0.2, default_cooldown: float = DEFAULT_COOLDOWN,
+                 shared: Optional[SharedTokenState] = None):
+        unique = list(dict.fromkeys(t.strip() for t in tokens if t and t.strip()))
+        if not unique:
+            raise ValueError("TokenPool requires at least one token")
+        self._states = [_TokenState(t) for t in unique]
+        self._by_token: Dict[str, _TokenState] = {s.token: s for s in self._states}
+        self.background_reserve = background_reserve
+        self.default_cooldown = default_cooldown
+        self._cond = threading.Condition()
+        self._interactive_waiting = 0
+        self._shared = shared
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def _usable(self, state: _TokenState, priority: int, now: float) -> bool:
+        if state.cooldown_until > now:
+            return False
+        if state.reset_at is not None and state.reset_at <= now:
+            # 额度窗口已重置
+            state.remaining, state.reset_at = None, None
+        if state.remaining is not None and state.remaining <= 0:
+            return False
+        if priority >= PRIORITY_BACKGROUND and state.remaining is not None and state.limit:
+            if state.remaining <= state.limit * self.background_reserve:
+                return False
+        return True
+
+    def _pick(self, priority: int) -> Optional[_TokenState]:
+        now = time.monotonic()
+        if priority >= PRIORITY_BACKGROUND:
+            if self._interactive_waiting or (self._shared is not None and self._shared.interactive_waiting()):
+                return None
+        candidates = [s for s in self._states if self._usable(s, priority, now)]
+        if not candidates:
+            return None
+        # 额度未知的 token 视为额度充足；额度相同时选择并发与累计请求较少的，使请求均匀分散
+        return max(candidates, key=lambda s: (
+            s.remaining if s.remaining is not None else float("inf"), -s.in_flight, -s.requests,
+        ))
+
+    def _next_wakeup(self) -> Optional[float]:
+        now = time.monotonic()
+        times = [s.cooldown_until - now for s in self._states if s.cooldown_until > now]
+        times += [s.reset_at - now for s in self._states if s.reset_at is not None and s.reset_at > now]
+        return min(times) if times else None
+
+    def acquire(self, priority: int = PRIORITY_INTERACTIVE, timeout: Optional[float] = None) -> str:
+        """
+        获取一个可用 token，全部不可用时阻塞等待。超过 timeout 秒仍不可用则抛出 RuntimeError。
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        waiter = f"{os.getpid()}:{threading.get_ident()}"
+        with self._cond:
+            waiting = False
+            try:
+                while True:
+                    if self._shared is not None:
+                        self._shared.load(self._states)
+                    state = self._pick(priority)
+                    if state is not None:
+                        state.in_flight += 1
+                        state.requests += 1
+                        if state.remaining is not None:
+                            state.remaining -= 1
+                            if self._shared is not None:
+                                self._shared.consume(state.token)
+                        return state.token
+                    if priority < PRIORITY_BACKGROUND:
+                        if not waiting:
+                            waiting = True
+                            self._interactive_waiting += 1
+                        if self._shared is not None:
+                            # 每轮刷新，其他进程据此判断交互式请求仍在等待
+                            self._shared.set_waiting(waiter, True)
+                    wait = self._next_wakeup()
+                    if self._shared is not None:
+                        wait = SHARED_POLL_INTERVAL if wait is None else min(wait, SHARED_POLL_INTERVAL)
+                    if deadline is not None:
+                        left = deadline - time.monotonic()
+                        if left <= 0:
+                            raise RuntimeError("All Figma access tokens are rate limited")
+                        wait = left if wait is None else min(wait, left)
+                    self._cond.wait(wait)
+            finally:
+                if waiting:
+                    self._interactive_waiting -= 1
+                    if self._shared is not None:
+                        self._shared.set_waiting(waiter, False)
+                    self._cond.notify_all()
+
+    def release(self, token: str, status_code: Optional[int] = None, headers: Optional[Mapping[str, str]] = None):
+        """
+        归还 token，并根据响应状态码与响应头更新其额度信息。
+        """
+        headers = headers or {}
+        with self._cond:
+            state = self._by_token.get(token)
+            if state is None:
+                return
+            if self._shared is not None:
+                # 先读取其他进程写入的状态 (如冷却期)，再合并本次响应头
+                self._shared.load([state])
+            state.in_flight = max(0, state.in_flight - 1)
+            now = time.monotonic()
+
+            limit = _header_int(headers, "X-RateLimit-Limit")
+            remaining = _header_int(headers, "X-RateLimit-Remaining")
+            reset = _header_int(headers, "X-RateLimit-Reset")
+            if limit is not None:
+                state.limit = limit
+            if remaining is not None:
+                state.remaining = remaining
+            if reset is not None:
+                # 兼容 Unix 时间戳与相对秒数两种写法
+                seconds = reset - time.time() if reset > 10 ** 9 else reset
+                state.reset_at = now + max(0.0, seconds)
+
+            if status_code == 429:
+                retry_after = _header_int(headers, "Retry-After")
+                cooldown = retry_after if retry_after is not None else self.default_cooldown
+                state.cooldown_until = now + cooldown
+                state.remaining = 0
+                state.reset_at = state.cooldown_until
+                state.throttled += 1
+            if self._shared is not None and (status_code == 429 or limit is not None or remaining is not None
+                                             or reset is not None):
+                self._shared.store(state)
+            self._cond.notify_all()
+
+    def stats(self) -> List[Dict[str, object]]:
+        now = time.monotonic()
+        with self._cond:
+            return [
+                {
+                    "token": f"...{s.token[-4:]}",
+                    "remaining": s.remaining,
+                    "limit": s.limit,
+                    "cooldown": round(max(0.0, s.cooldown_until - now), 1),
+                    "in_flight": s.in_flight,
+                    "requests": s.requests,
+                    "throttled": s.throttled,
+                }
+                for s in self._states
+            ]
+
+
+_pool: Optional[TokenPool] = None
+_pool_tokens: Optional[tuple] = None
+_pool_lock = threading.Lock()
+
+
+def _shared_state() -> Optional[SharedTokenState]:
+    path = os.getenv("FIGMA_TOKEN_STATE_DB")
+    if path and path.lower() == "off":
+        return None
+    if not path:
+        from app.repository import default_index_folder
+
+        path = os.path.join(default_index_folder(), "token_pool.db")
+    return SharedTokenState(path)
+
+
+def get_token_pool() -> Optional[TokenPool]:
+    """
+    从环境变量构建进程级令牌池：FIGMA_ACCESS_TOKENS (逗号分隔) 与 FIGMA_ACCESS_TOKEN。
+    未配置任何 token 时返回 None。
+
+    额度状态共享给同一台机器上的其他进程：默认写入索引目录 (FIGMA_INDEX_FOLDER，
+    默认 backend/data_cache) 下的 token_pool.db，可通过 FIGMA_TOKEN_STATE_DB 指定，设为 off 时不共享。
+    """
+    global _pool, _pool_tokens
+    tokens = [t for t in (os.getenv("FIGMA_ACCESS_TOKENS") or "").split(",") if t.strip()]
+    if os.getenv("FIGMA_ACCESS_TOKEN"):
+        tokens.append(os.getenv("FIGMA_ACCESS_TOKEN"))
+    key = tuple(t.strip() for t in tokens)
+    if not key:
+        return None
+    with _pool_lock:
+        if _pool is None or _pool_tokens != key:
+            _pool, _pool_tokens = TokenPool(list(key), shared=_shared_state()), key
+        return _pool
@@ -0,0 +1,238 @@
+import json
+import sqlite3
+import zlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
+
+from app.services.figma import iter_simplified_nodes
+from app.services.sqlite_index import SQLiteIndex
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS versions (
+    id INTEGER PRIMARY KEY,
+    file_key TEXT NOT NULL,
+    cache_node_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    version TEXT NOT NULL,
+    is_snapshot INTEGER NOT NULL,
+    payload BLOB NOT NULL,
+    node_count INTEGER,
+    created_at TEXT,
+    UNIQUE (file_key, cache_node_id, seq)
+);
+CREATE TABLE IF NOT EXISTS version_heads (
+    file_key TEXT NOT NULL,
+    cache_node_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    payload BLOB NOT NULL,
+    PRIMARY KEY (file_key, cache_node_id)
+);
+"""
+
+# 每隔若干个版本保存一次完整快照，限制还原历史版本时需要回放的增量数量
+SNAPSHOT_INTERVAL = 20
+
+
+def _pack(value: Any) -> bytes:
+    return zlib.compress(json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def _unpack(blob: bytes) -> Any:
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+def flatten_tree(data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    将简化后的节点树展开为 node_id -> 节点属性 的映射。
+    children 替换为 childIds，并记录 parentId，使结构变化 (移动、重排) 也能被识别为修改。
+    """
+    flat: Dict[str, Dict[str, Any]] = {}
+    for node, ancestors in iter_simplified_nodes(data):
+        node_id = node.get("id")
+        if node_id is None:
+            continue
+        entry = {k: v for k, v in node.items() if k != "children"}
+        entry["parentId"] = ancestors[-1].get("id") if ancestors else None
+        if node.get("children"):
+            entry["childIds"] = [c.get("id") for c in node["children"]]
+        flat[node_id] = entry
+    return flat
+
+
+def diff_trees(old: Dict[str, Dict[str, Any]], new: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """按 node id 比较两个展开后的节点树，返回结构化增量。"""
+    added = {node_id: node for node_id, node in new.items() if node_id not in old}
+    removed = [node_id for node_id in old if node_id not in new]
+    modified = {node_id: node for node_id, node in new.items() if node_id in old and old[node_id] != node}
+    return {"added": added, "removed": removed, "modified": modified}
+
+
+def apply_delta(tree: Dict[str, Dict[str, Any]], delta: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    result = dict(tree)
+    for node_id in delta.get("removed", []):
+        result.pop(node_id, None)
+    result.update(delta.get("added", {}))
+    result.update(delta.get("modified", {}))
+    return result
+
+
+class VersionStore(SQLiteIndex):
+    """
+    每个缓存条目 (file_key, cache_node_id) 的版本链，以 Figma lastModified 作为版本号。
+    只有 lastModified 变化时才追加新版本；同一 lastModified 的内容变化 (如不同 depth) 原地替换最新版本。
+    首个版本及每 SNAPSHOT_INTERVAL 个版本保存完整快照，其余版本只保存相对上一版本的增量。
+    version_heads 保存最新版本的完整树，写入新版本时无需回放历史。
+    """
+
+    SCHEMA = _SCHEMA
+
+    def _index_document(self, conn: sqlite3.Connection, file_key: str, cache_node_id: Optional[str], data: Dict[str, Any]):
+        key = (file_key, cache_node_id or "")
+        version = (data.get("metadata") or {}).get("lastModified") or datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ")
+        tree = flatten_tree(data)
+
+        head = conn.execute(
+            "SELECT seq, payload FROM version_heads WHERE file_key = ? AND cache_node_id = ?", key
+        ).fetchone()
+        if head is None:
+            seq, is_snapshot, payload = 1, True, tree
+        else:
+            head_seq, head_tree = head[0], _unpack(head[1])
+            delta = diff_trees(head_tree, tree)
+            if not (delta["added"] or delta["removed"] or delta["modified"]):
+                return
+            head_version, head_is_snapshot = conn.execute(
+                "SELECT version, is_snapshot FROM versions WHERE file_key = ? AND cache_node_id = ? AND seq = ?",
+                key + (head_seq,),
+            ).fetchone()
+            if head_version == version:
+                # lastModified 未变 (如以不同 depth 重新获取)：不是新版本，原地替换最新版本的内容
+                if head_is_snapshot:
+                    payload = tree
+                else:
+                    payload = diff_trees(self.load_tree(file_key, cache_node_id, head_seq - 1), tree)
+                conn.execute(
+                    "UPDATE versions SET payload = ?, node_count = ?, created_at = ? "
+                    "WHERE file_key = ? AND cache_node_id = ? AND seq = ?",
+                    (_pack(payload), len(tree), datetime.now().isoformat()) + key + (head_seq,),
+                )
+                conn.execute(
+                    "UPDATE version_heads SET payload = ? WHERE file_key = ? AND cache_node_id = ?",
+                    (_pack(tree),) + key,
+                )
+                return
+            seq = head_seq + 1
+            is_snapshot = (seq - 1) % SNAPSHOT_INTERVAL == 0
+            payload = tree if is_snapshot else delta
+
+        conn.execute(
+            "INSERT INTO versions (file_key, cache_node_id, seq, version, is_snapshot, payload, node_count, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            key + (seq, version, int(is_snapshot), _pack(payload), len(tree), datetime.now().isoformat()),
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO version_heads (file_key, cache_node_id, seq, payload) VALUES (?, ?, ?, ?)",
+            key + (seq, _pack(tree)),
+        )
+
+    def remove_document(self, file_key: str, cache_node_id: Optional[str]):
+        key = (file_key, cache_node_id or "")
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM versions WHERE file_key = ? AND cache_node_id = ?", key)
+            conn.execute("DELETE FROM version_heads WHERE file_key = ? AND cache_node_id = ?", key)
+
+    def list_versions(self, file_key: str, cache_node_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        rows = self._connect().execute(
+            "SELECT seq, version, is_snapshot, node_count, created_at, length(payload) FROM versions "
+            "WHERE file_key = ? AND cache_node_id = ? ORDER BY seq",
+            (file_key, cache_node_id or ""),
+        ).fetchall()
+        return [
+            {"seq": seq, "version": version, "snapshot": bool(is_snapshot), "node_count": node_count,
+             "created_at": created_at, "stored_bytes": stored_bytes}
+            for seq, version, is_snapshot, node_count, created_at, stored_bytes in rows
+        ]
+
+    def _resolve_seq(self, versions: List[Dict[str, Any]], ref: Union[int, str, None], default: int) -> int:
+        """ref 可以是版本序号 (seq) 或 Figma lastModified 字符串；同一 lastModified 有多个版本时取最新。"""
+        if ref is None or ref == "":
+            return default
+        if isinstance(ref, int) or (isinstance(ref, str) and ref.isdigit()):
+            seq = int(ref)
+            if any(v["seq"] == seq for v in versions):
+                return seq
+        else:
+            matches = [v["seq"] for v in versions if v["version"] == ref]
+            if matches:
+                return matches[-1]
+        raise ValueError(f"Version not found: {ref}")
+
+    def load_tree(self, file_key: str, cache_node_id: Optional[str], seq: int) -> Dict[str, Dict[str, Any]]:
+        key = (file_key, cache_node_id or "")
+        conn = self._connect()
+        head = conn.execute(
+            "SELECT seq, payload FROM version_heads WHERE file_key = ? AND cache_node_id = ?", key
+        ).fetchone()
+        if head and head[0] == seq:
+            return _unpack(head[1])
+        base = conn.execute(
+            "SELECT seq FROM versions WHERE file_key = ? AND cache_node_id = ? AND seq <= ? AND is_snapshot = 1 "
+            "ORDER BY seq DESC LIMIT 1",
+            key + (seq,),
+        ).fetchone()
+        if base is None:
+            raise ValueError(f"No snapshot found for version {seq}")
+        rows = conn.execute(
+            "SELECT is_snapshot, payload FROM versions WHERE file_key = ? AND cache_node_id = ? AND seq >= ? AND seq <= ? "
+            "ORDER BY seq",
+            key + (base[0], seq),
+        ).fetchall()
+        tree: Dict[str, Dict[str, Any]] = {}
+        for is_snapshot, payload in rows:
+            tree = _unpack(payload) if is_snapshot else apply_delta(tree, _unpack(payload))
+        return tree
+
+    def changes(
+        self,
+        file_key: str,
+        cache_node_id: Optional[str] = None,
+        from_version: Union[int, str, None] = None,
+        to_version: Union[int, str, None] = None,
+    ) -> Dict[str, Any]:
+        """
+        返回两个版本之间新增、删除、修改的节点。
+        默认 to_version 为最新版本，from_version 为 to_version 的上一个版本。
+        """
+        versions = self.list_versions(file_key, cache_node_id)
+        if not versions:
+            raise ValueError(f"No versions recorded for {file_key} {cache_node_id or ''}".strip())
+        to_seq = self._resolve_seq(versions, to_version, versions[-1]["seq"])
+        from_seq = self._resolve_seq(versions, from_version, max(1, to_seq - 1))
+
+        old_tree = self.load_tree(file_key, cache_node_id, from_seq)
+        new_tree = old_tree if from_seq == to_seq else self.load_tree(file_key, cache_node_id, to_seq)
+        delta = diff_trees(old_tree, new_tree)
+
+        modified = []
+        for node_id, node in delta["modified"].items():
+            before = old_tree[node_id]
+            changed = sorted(k for k in set(before) | set(node) if before.get(k) != node.get(k))
+            modified.append({
+                "node": node,
+                "changed_fields": changed,
+                "before": {k: before.get(k) for k in changed},
+            })
+
+        by_seq = {v["seq"]: v for v in versions}
+        return {
+            "file_key": file_key,
+            "node_id": cache_node_id,
+            "from": {"seq": from_seq, "version": by_seq[from_seq]["version"]},
+            "to": {"seq": to_seq, "version": by_seq[to_seq]["version"]},
+            "added": list(delta["added"].values()),
+            "removed": [{"id": node_id, "name": old_tree[node_id].get("name"), "type": old_tree[node_id].get("type")}
+                        for node_id in delta["removed"]],
+            "modified": modified,
+            "versions": [{"seq": v["seq"], "version": v["version"]} for v in versions],
+        }
@@ -0,0 +1,226 @@
+"""
+共享缓存后端 (routers/api.py 中 /api/entry 等端点) 的本地替身服务。
+
+以 FileSystemRepository 作为存储，实现 RemoteRepository 使用到的端点：
+
+    GET  /api/entry?file_key=...&node_id=...   (ETag / If-None-Match -> 304)
+    GET  /api/entries?cursor=...&limit=...     (分页遍历，用于缓存包导出)
+    POST /api/entries/lookup                   (批量读取，每个 key 可带 etag -> 304)
+    PUT  /api/entry                            (支持 Content-Encoding: gzip)
+    GET  /api/search | /api/layout | /api/changes | /api/catalog | /api/catalog/usages
+
+无需 MySQL 即可测试共享缓存模式：将 FIGMA_CACHE_REMOTE_URL 指向 `stub.base_url`。
+"""
+import gzip
+import hashlib
+import itertools
+import json
+import os
+import sys
+import tempfile
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.repository import FileSystemRepository
+
+
+def _etag(data: str) -> str:
+    return '"' + hashlib.sha1((data or "").encode("utf-8")).hexdigest() + '"'
+
+
+def _iso(value: Any) -> Optional[str]:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _entry_body(item) -> Dict[str, Any]:
+    return {
+        "file_key": item.file_key,
+        "node_id": item.node_id,
+        "name": item.name,
+        "depth": item.depth,
+        "last_modified": _iso(item.last_modified),
+        "updated_at": _iso(getattr(item, "updated_at", None)),
+        "data": item.data,
+    }
+
+
+class CacheStubServer:
+    def __init__(self, data_folder: Optional[str] = None, host: str = "127.0.0.1", port: int = 0):
+        self.repo = FileSystemRepository(data_folder or tempfile.mkdtemp(prefix="figma_cache_stub_"))
+        self.stats = {"get": 0, "lookup": 0, "not_modified": 0, "put": 0, "bytes_out": 0, "bytes_in": 0}
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/api"
+
+    def start(self) -> "CacheStubServer":
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None):
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                extra = dict(headers or {})
+                if "gzip" in (self.headers.get("Accept-Encoding") or "") and len(body) >= 1024:
+                    body = gzip.compress(body)
+                    extra["Content-Encoding"] = "gzip"
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in extra.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+                stub._count("bytes_out", len(body))
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+                try:
+                    if parsed.path == "/api/entry":
+                        stub._count("get")
+                        item = stub.repo.get_data(query.get("file_key"), query.get("node_id") or None)
+                        if not item:
+                            self._send_json(404, {"detail": "Item not found"})
+                            return
+                        etag = _etag(item.data)
+                        if self.headers.get("If-None-Match") == etag:
+                            stub._count("not_modified")
+                            self.send_response(304)
+                            self.send_header("ETag", etag)
+                            self.send_header("Content-Length", "0")
+                            self.end_headers()
+                            return
+                        self._send_json(200, _entry_body(item), {"ETag": etag})
+                    elif parsed.path == "/api/entries":
+                        # 文件系统仓储没有自增 id，以偏移量作为游标
+                        multi = parse_qs(parsed.query)
+                        offset, limit = int(query.get("cursor") or 0), int(query.get("limit", 50))
+                        entries = stub.repo.iter_entries(
+                            file_keys=multi.get("file_key"),
+                            updated_from=datetime.fromisoformat(query["updated_from"]) if query.get("updated_from") else None,
+                            updated_to=datetime.fromisoformat(query["updated_to"]) if query.get("updated_to") else None,
+                        )
+                        page = list(itertools.islice(entries, offset, offset + limit))
+                        self._send_json(200, {
+                            "items": [_entry_body(item) for item in page],
+                            "next_cursor": offset + limit if len(page) == limit else None,
+                        })
+                    elif parsed.path == "/api/search":
+                        items = stub.repo.search_nodes(query["q"], query.get("file_key"), query.get("node_type"),
+                                                       int(query.get("limit", 20)))
+                        self._send_json(200, {"total": len(items), "items": items})
+                    elif parsed.path == "/api/layout":
+                        numbers = {k: float(query[k]) for k in ("x", "y", "width", "height") if k in query}
+                        items = stub.repo.query_layout(
+                            query["file_key"], mode=query.get("mode", "intersects"), node_id=query.get("node_id"),
+                            cache_node_id=query.get("cache_node_id"), node_type=query.get("node_type"),
+                            limit=int(query["limit"]) if query.get("limit") else None, page_id=query.get("page_id"),
+                            **numbers,
+                        )
+                        self._send_json(200, {"total": len(items), "items": items})
+                    elif parsed.path == "/api/catalog":
+                        items = stub.repo.lookup_catalog(query.get("q"), query.get("key"), query.get("kind"),
+                                                         query.get("file_key"), int(query.get("limit", 20)))
+                        self._send_json(200, {"total": len(items), "items": items})
+                    elif parsed.path == "/api/catalog/usages":
+                        self._send_json(200, stub.repo.catalog_usages(query["key"], query.get("file_key"),
+                                                                      int(query.get("limit", 100))))
+                    elif parsed.path == "/api/changes":
+                        self._send_json(200, stub.repo.get_changes(
+                            query["file_key"], query.get("node_id"), query.get("from_version"), query.get("to_version")))
+                    else:
+                        self._send_json(404, {"detail": "Not Found"})
+                except ValueError as e:
+                    self._send_json(404, {"detail": str(e)})
+
+            def do_POST(self):
+                parsed = urlparse(self.path)
+                if parsed.path != "/api/entries/lookup":
+                    self._send_json(404, {"detail": "Not Found"})
+                    return
+                stub._count("lookup")
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)))
+                keys = [(k["file_key"], k.get("node_id") or None) for k in body["keys"]]
+                found = stub.repo.get_many(keys)
+                items = []
+                for k, key in zip(body["keys"], keys):
+                    item = found.get(key)
+                    result: Dict[str, Any] = {"file_key": key[0], "node_id": key[1]}
+                    if not item:
+                        result["status"] = 404
+                    else:
+                        result["etag"] = _etag(item.data)
+                        if k.get("etag") == result["etag"]:
+                            stub._count("not_modified")
+                            result["status"] = 304
+                        else:
+                            result["status"] = 200
+                            result["entry"] = _entry_body(item)
+                    items.append(result)
+                self._send_json(200, {"items": items})
+
+            def do_PUT(self):
+                parsed = urlparse(self.path)
+                if parsed.path != "/api/entry":
+                    self._send_json(404, {"detail": "Not Found"})
+                    return
+                raw = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                stub._count("put")
+                stub._count("bytes_in", len(raw))
+                if self.headers.get("Content-Encoding") == "gzip":
+                    raw = gzip.decompress(raw)
+                payload = json.loads(raw)
+                last_modified = datetime.fromisoformat(payload["last_modified"]) if payload.get("last_modified") else None
+                stub.repo.save_data(payload["file_key"], payload.get("node_id") or None, payload.get("data"),
+                                    payload.get("name"), payload.get("depth"), last_modified)
+                self._send_json(200, {"message": "Saved successfully"}, {"ETag": _etag(payload.get("data"))})
+
+        return Handler
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a local stand-in for the shared cache backend")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--data-folder", default=None)
+    args = parser.parse_args()
+
+    server = CacheStubServer(args.data_folder, port=args.port)
+    print(f"Shared cache stub listening on {server.base_url} (data: {server.repo.data_folder})")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
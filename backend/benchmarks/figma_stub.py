@@ -0,0 +1,212 @@
+"""
+Figma REST API 本地替身服务。
+
+实现 `FigmaService` 使用到的端点，支持可配置的响应延迟与 429 注入：
+
+    GET /v1/files/{key}
+    GET /v1/files/{key}/nodes?ids=...
+    GET /v1/files/{key}/images
+    GET /v1/images/{key}?ids=...&format=...
+    GET /assets/{name}
+
+将 `FIGMA_API_BASE_URL` 指向 `stub.base_url` 即可让 `FigmaService` 改为请求本地替身。
+"""
+import json
+import os
+import random
+import struct
+import sys
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import file_response, nodes_response
+
+
+def _png_chunk(tag: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+
+def make_png(width: int = 64, height: int = 64, level: int = 1) -> bytes:
+    """生成一张低压缩率的渐变 RGBA PNG，模拟 Figma 导出的渲染图。"""
+    rows = []
+    for y in range(height):
+        row = bytearray([0])
+        for x in range(width):
+            row += bytes([x * 255 // max(1, width - 1), y * 255 // max(1, height - 1), 128, 255])
+        rows.append(bytes(row))
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + _png_chunk(b"IHDR", header)
+        + _png_chunk(b"tEXt", b"Software\x00Figma")
+        + _png_chunk(b"IDAT", zlib.compress(b"".join(rows), level))
+        + _png_chunk(b"IEND", b"")
+    )
+
+
+TINY_PNG = make_png()
+TINY_SVG = (
+    b'<svg xmlns="http://www.w3.org/2000/svg" width="24" height="24" viewBox="0 0 24 24">'
+    b'<path d="M12.000000 2.000000L22.000000 22.000000L2.000000 22.000000Z" fill="#000000"/></svg>'
+)
+
+
+class FigmaStubServer:
+    def __init__(
+        self,
+        documents: Optional[Dict[str, Dict[str, Any]]] = None,
+        latency: float = 0.0,
+        throttle_rate: float = 0.0,
+        retry_after: int = 1,
+        throttled_tokens: Optional[List[str]] = None,
+        seed: int = 0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        """
+        documents: file_key -> GetFileResponse 结构的文档
+        latency: 每个请求附加的延迟 (秒)
+        throttle_rate: 以该概率返回 429 (0~1)
+        retry_after: 429 响应中的 Retry-After 秒数
+        throttled_tokens: 对这些 X-Figma-Token 始终返回 429 (用于测试令牌池)
+        """
+        self.documents = documents or {}
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.throttled_tokens = set(throttled_tokens or [])
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "throttled": 0}
+        self.request_log = []
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def asset_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/assets"
+
+    def start(self) -> "FigmaStubServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _should_throttle(self, token: Optional[str] = None) -> bool:
+        with self._lock:
+            self.stats["requests"] += 1
+            throttled = token in self.throttled_tokens or (self.throttle_rate > 0 and self._rng.random() < self.throttle_rate)
+            if throttled:
+                self.stats["throttled"] += 1
+            return throttled
+
+    def _route(self, path: str, query: Dict[str, list]):
+        parts = [p for p in path.split("/") if p]
+        depth = int(query["depth"][0]) if query.get("depth") else None
+
+        if len(parts) == 2 and parts[0] == "assets":
+            if parts[1].endswith(".svg"):
+                return 200, TINY_SVG, "image/svg+xml"
+            return 200, TINY_PNG, "image/png"
+
+        if len(parts) < 3 or parts[0] != "v1":
+            return 404, {"status": 404, "err": "Not found"}, None
+
+        if parts[1] == "files":
+            document = self.documents.get(parts[2])
+            if document is None:
+                return 404, {"status": 404, "err": "Not found"}, None
+            if len(parts) == 3:
+                return 200, file_response(document, depth), None
+            if parts[3] == "nodes":
+                ids = [i for i in query.get("ids", [""])[0].split(",") if i]
+                return 200, nodes_response(document, ids, depth), None
+            if parts[3] == "images":
+                return 200, {"error": False, "status": 200, "meta": {"images": {}}}, None
+
+        if parts[1] == "images":
+            if parts[2] not in self.documents:
+                return 404, {"status": 404, "err": "Not found"}, None
+            fmt = query.get("format", ["png"])[0]
+            ids = [i for i in query.get("ids", [""])[0].split(",") if i]
+            images = {i: f"{self.asset_url}/{i.replace(':', '-')}.{fmt}" for i in ids}
+            return 200, {"err": None, "images": images}, None
+
+        return 404, {"status": 404, "err": "Not found"}, None
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, content_type: str, headers: Optional[Dict[str, str]] = None):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                stub.request_log.append(parsed.path)
+                if stub.latency:
+                    time.sleep(stub.latency)
+                if stub._should_throttle(self.headers.get("X-Figma-Token")):
+                    body = json.dumps({"status": 429, "err": "Rate limit exceeded"}).encode()
+                    self._send(429, body, "application/json", {"Retry-After": str(stub.retry_after)})
+                    return
+                status, payload, content_type = stub._route(parsed.path, parse_qs(parsed.query))
+                if content_type:
+                    self._send(status, payload, content_type)
+                else:
+                    self._send(status, json.dumps(payload).encode(), "application/json")
+
+        return Handler
+
+
+if __name__ == "__main__":
+    import argparse
+    from benchmarks.synthetic import generate_document
+
+    parser = argparse.ArgumentParser(description="Run a local Figma REST API stand-in")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--files", type=int, default=3, help="number of synthetic files (keys: bench0, bench1, ...)")
+    args = parser.parse_args()
+
+    docs = {f"bench{i}": generate_document(seed=i, name=f"Synthetic {i}") for i in range(args.files)}
+    server = FigmaStubServer(docs, latency=args.latency, throttle_rate=args.throttle_rate, port=args.port)
+    print(f"Figma stub listening on {server.base_url} (files: {', '.join(docs)})")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
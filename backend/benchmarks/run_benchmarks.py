@@ -0,0 +1,283 @@
+"""
+基准测试入口。
+
+测量项：
+  1. simplify: `process_figma_response` 简化吞吐 (节点/秒)
+  2. repository: 各存储后端 `save_data` / `get_data` 延迟
+  3. get_figma_data: `get_figma_data_tool` 端到端命中 (HIT) 与未命中 (MISS) 延迟，
+     远程请求由本地 Figma 替身服务 (benchmarks/figma_stub.py) 响应
+
+结果写入 JSON 文件，可通过 --compare 与历史结果对比：
+
+    python benchmarks/run_benchmarks.py --output bench_results.json
+    python benchmarks/run_benchmarks.py --compare bench_results.json
+
+MySQL 后端仅在设置了 DB_HOST 或 DB_PASSWORD 时参与测试 (与 mcp_server.py 的判定一致)。
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+from benchmarks.figma_stub import FigmaStubServer
+from benchmarks.synthetic import generate_document, iter_nodes, pick_node_ids
+from app.services.figma import process_figma_response
+
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    """将秒级样本汇总为毫秒级统计。"""
+    ordered = sorted(samples)
+    ms = [s * 1000 for s in ordered]
+
+    def pct(p: float) -> float:
+        return round(ms[min(len(ms) - 1, int(round(p * (len(ms) - 1))))], 4)
+
+    return {
+        "n": len(ms),
+        "mean_ms": round(statistics.fmean(ms), 4),
+        "p50_ms": pct(0.5),
+        "p95_ms": pct(0.95),
+        "min_ms": round(ms[0], 4),
+        "max_ms": round(ms[-1], 4),
+    }
+
+
+def _timeit(fn: Callable[[], Any], iterations: int, warmup: int = 1) -> List[float]:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+@contextlib.contextmanager
+def _quiet():
+    # get_figma_data_tool 会向 stderr 打印命中/未命中横幅，测试时屏蔽
+    with contextlib.redirect_stderr(io.StringIO()):
+        yield
+
+
+def bench_simplify(document: Dict[str, Any], iterations: int) -> Dict[str, Any]:
+    node_count = sum(1 for _ in iter_nodes(document["document"]))
+    samples = _timeit(lambda: process_figma_response(document), iterations)
+    result = _summary(samples)
+    result["nodes"] = node_count
+    result["nodes_per_sec"] = round(node_count / statistics.fmean(samples), 1)
+    return result
+
+
+def _build_repositories(tmp_dir: str) -> Dict[str, Callable[[], Any]]:
+    from app.repository import FileSystemRepository
+
+    factories: Dict[str, Callable[[], Any]] = {
+        "filesystem": lambda: FileSystemRepository(os.path.join(tmp_dir, "fs_cache")),
+    }
+    if os.getenv("DB_HOST") or os.getenv("DB_PASSWORD"):
+        def mysql_factory():
+            from app.database import SessionLocal
+            from app.repository import MySQLRepository
+            return MySQLRepository(SessionLocal())
+        factories["mysql"] = mysql_factory
+    return factories
+
+
+def _close(repo: Any):
+    db = getattr(repo, "db", None)
+    if db is not None:
+        db.close()
+
+
+def bench_repository(factory: Callable[[], Any], payload: str, iterations: int, key_prefix: str) -> Dict[str, Any]:
+    repo = factory()
+    try:
+        counter = {"i": 0}
+        last_modified = datetime(2026, 1, 14, 5, 57, 11)
+
+        def write():
+            counter["i"] += 1
+            repo.save_data(f"{key_prefix}w{counter['i']}", None, payload, "bench", None, last_modified)
+
+        def overwrite():
+            repo.save_data(f"{key_prefix}hot", None, payload, "bench", None, last_modified)
+
+        overwrite()
+
+        def read():
+            item = repo.get_data(f"{key_prefix}hot", None)
+            json.loads(item.data)
+
+        def read_miss():
+            repo.get_data(f"{key_prefix}missing", None)
+
+        return {
+            "payload_bytes": len(payload.encode("utf-8")),
+            "write_new": _summary(_timeit(write, iterations)),
+            "write_overwrite": _summary(_timeit(overwrite, iterations)),
+            "read_hit": _summary(_timeit(read, iterations)),
+            "read_miss": _summary(_timeit(read_miss, iterations)),
+        }
+    finally:
+        _close(repo)
+
+
+def bench_get_figma_data(factory: Callable[[], Any], stub: FigmaStubServer, file_key: str,
+                         node_ids: List[str], iterations: int) -> Dict[str, Any]:
+    from app.services.mcp_tools import get_figma_data_tool
+
+    repo = factory()
+    errors = {"count": 0}
+
+    def call(node_id: Optional[str], force_refresh: bool = False):
+        # 注入 429 时远程请求会失败，记录失败次数而不是中断测试
+        try:
+            get_figma_data_tool(repo, "bench-token", file_key, node_id, force_refresh=force_refresh)
+        except Exception:
+            errors["count"] += 1
+
+    try:
+        results: Dict[str, Any] = {}
+        with _quiet():
+            for label, node_id in [("file", None), ("node", ",".join(node_ids[:1]) or None)]:
+                call(node_id, force_refresh=True)
+                results[f"{label}_miss"] = _summary(_timeit(lambda: call(node_id, True), iterations, warmup=0))
+                results[f"{label}_hit"] = _summary(_timeit(lambda: call(node_id), iterations, warmup=0))
+        results["errors"] = errors["count"]
+        results["stub_requests"] = stub.stats["requests"]
+        results["stub_throttled"] = stub.stats["throttled"]
+        return results
+    finally:
+        _close(repo)
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    document = generate_document(
+        pages=args.pages,
+        frames_per_page=args.frames,
+        depth=args.depth,
+        fanout=args.fanout,
+        style_variants=args.style_variants,
+        seed=args.seed,
+    )
+    payload = json.dumps(process_figma_response(document))
+    report: Dict[str, Any] = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": {
+                "pages": args.pages,
+                "frames": args.frames,
+                "depth": args.depth,
+                "fanout": args.fanout,
+                "style_variants": args.style_variants,
+                "seed": args.seed,
+                "iterations": args.iterations,
+                "latency": args.latency,
+                "throttle_rate": args.throttle_rate,
+            },
+        },
+        "results": {},
+    }
+
+    report["results"]["simplify"] = bench_simplify(document, args.iterations)
+
+    tmp_dir = tempfile.mkdtemp(prefix="figma_bench_")
+    key_prefix = f"bench{int(time.time())}"
+    try:
+        factories = _build_repositories(tmp_dir)
+        report["results"]["repository"] = {
+            name: bench_repository(factory, payload, args.iterations, key_prefix)
+            for name, factory in factories.items()
+        }
+
+        file_key = f"{key_prefix}file"
+        stub = FigmaStubServer({file_key: document}, latency=args.latency, throttle_rate=args.throttle_rate)
+        previous_base_url = os.environ.get("FIGMA_API_BASE_URL")
+        os.environ["FIGMA_API_BASE_URL"] = stub.base_url
+        try:
+            with stub:
+                node_ids = pick_node_ids(document, 1)
+                report["results"]["get_figma_data"] = {
+                    name: bench_get_figma_data(factory, stub, file_key, node_ids, args.iterations)
+                    for name, factory in factories.items()
+                }
+        finally:
+            if previous_base_url is None:
+                os.environ.pop("FIGMA_API_BASE_URL", None)
+            else:
+                os.environ["FIGMA_API_BASE_URL"] = previous_base_url
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    return report
+
+
+def _flatten(prefix: str, value: Any, out: Dict[str, float]):
+    if isinstance(value, dict):
+        for k, v in value.items():
+            _flatten(f"{prefix}.{k}" if prefix else k, v, out)
+    elif isinstance(value, (int, float)):
+        out[prefix] = value
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    """对比两次结果中的 *_ms 与 *_per_sec 指标。"""
+    old: Dict[str, float] = {}
+    new: Dict[str, float] = {}
+    _flatten("", baseline.get("results", {}), old)
+    _flatten("", current.get("results", {}), new)
+    lines = []
+    for key in sorted(new):
+        if key not in old or not (key.endswith("p50_ms") or key.endswith("_per_sec")):
+            continue
+        before, after = old[key], new[key]
+        change = ((after - before) / before * 100) if before else 0.0
+        lines.append(f"{key:<60} {before:>12.3f} -> {after:>12.3f} ({change:+.1f}%)")
+    return lines
+
+
+def main(argv: Optional[List[str]] = None):
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Figma MCP cache benchmarks")
+    parser.add_argument("--pages", type=int, default=2)
+    parser.add_argument("--frames", type=int, default=4, help="frames per page")
+    parser.add_argument("--depth", type=int, default=4, help="nesting levels below each frame")
+    parser.add_argument("--fanout", type=int, default=4, help="children per container node")
+    parser.add_argument("--style-variants", type=int, default=8, help="distinct fill/text styles (lower = more repetition)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.02, help="stub latency per request in seconds")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="probability of a 429 from the stub")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="baseline results file to compare against")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print("\n".join(compare(baseline, report)))
+
+
+if __name__ == "__main__":
+    main()
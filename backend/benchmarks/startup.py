@@ -0,0 +1,191 @@
+"""
+MCP Server 冷启动基准与导入时间预算。
+
+测量项：
+  1. import: 全新进程中 `import mcp_server` 的导入耗时 (-X importtime)，拆分为 mcp 框架与本项目自身开销；
+     并检查文件系统模式下是否导入了不应在启动时加载的重依赖 (SQLAlchemy / ORM 模型 / requests)
+  2. initialize: 启动 stdio 进程到收到 initialize 响应的端到端耗时
+  3. daemon (--daemon): 守护进程已运行时，stdio 启动 (FIGMA_MCP_DAEMON=1) 到收到 initialize 响应的耗时
+
+超出预算或导入了禁止的模块时以非零状态退出，可用于 CI：
+
+    python benchmarks/startup.py --budget-ms 100
+    python benchmarks/startup.py --daemon
+"""
+import argparse
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER_SCRIPT = os.path.join(BACKEND_DIR, "mcp_server.py")
+
+# 文件系统模式下启动时不应导入的模块
+FORBIDDEN_MODULES = ["sqlalchemy", "app.models", "app.database", "requests", "mysql.connector"]
+DEFAULT_BUDGET_MS = 100.0
+
+_IMPORTTIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$")
+
+INITIALIZE_REQUEST = {
+    "jsonrpc": "2.0",
+    "id": 1,
+    "method": "initialize",
+    "params": {
+        "protocolVersion": "2024-11-05",
+        "capabilities": {},
+        "clientInfo": {"name": "startup-benchmark", "version": "1"},
+    },
+}
+
+
+def _env(data_folder: str, **extra: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    for key in ("FIGMA_CACHE_REMOTE_URL", "DB_HOST", "DB_PASSWORD", "FIGMA_MCP_DAEMON", "FIGMA_MCP_DAEMON_SOCKET"):
+        env.pop(key, None)
+    env["FIGMA_FILE_DATA_FOLDER"] = data_folder
+    env.update(extra)
+    return env
+
+
+def _median_ms(samples: List[float]) -> float:
+    return round(statistics.median(samples) * 1000, 2)
+
+
+def measure_imports(data_folder: str, iterations: int) -> Dict[str, Any]:
+    """在全新进程中导入 mcp_server，按 -X importtime 输出拆分框架与项目自身的导入耗时。"""
+    code = (
+        "import sys, json; import mcp_server; "
+        f"print(json.dumps([m for m in {FORBIDDEN_MODULES!r} if m in sys.modules]))"
+    )
+    totals, frameworks, loaded = [], [], set()
+    for _ in range(iterations):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=BACKEND_DIR, env=_env(data_folder), capture_output=True, text=True, check=True,
+        )
+        total = framework = 0
+        for line in result.stderr.splitlines():
+            match = _IMPORTTIME.match(line)
+            if not match:
+                continue
+            cumulative, indent, name = int(match.group(2)), len(match.group(3)), match.group(4)
+            if name == "mcp_server" and indent == 0:
+                total = cumulative
+            elif indent == 2 and name.split(".")[0] == "mcp":
+                framework += cumulative
+        totals.append(total / 1e6)
+        frameworks.append(framework / 1e6)
+        loaded.update(json.loads(result.stdout.strip().splitlines()[-1]))
+    return {
+        "n": iterations,
+        "total_ms": _median_ms(totals),
+        "framework_ms": _median_ms(frameworks),
+        "app_ms": _median_ms([t - f for t, f in zip(totals, frameworks)]),
+        "forbidden_loaded": sorted(loaded),
+    }
+
+
+def _time_initialize(env: Dict[str, str], timeout: float = 30.0) -> float:
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, SERVER_SCRIPT],
+        cwd=BACKEND_DIR, env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+    )
+    try:
+        process.stdin.write((json.dumps(INITIALIZE_REQUEST) + "\n").encode("utf-8"))
+        process.stdin.flush()
+        line = process.stdout.readline()
+        elapsed = time.perf_counter() - start
+        if not line or json.loads(line).get("id") != 1:
+            raise RuntimeError(f"Unexpected initialize response: {line!r}")
+        return elapsed
+    finally:
+        process.stdin.close()
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def measure_initialize(data_folder: str, iterations: int) -> Dict[str, Any]:
+    env = _env(data_folder)
+    samples = [_time_initialize(env) for _ in range(iterations)]
+    return {"n": iterations, "p50_ms": _median_ms(samples), "min_ms": round(min(samples) * 1000, 2)}
+
+
+def measure_daemon(data_folder: str, iterations: int, timeout: float = 30.0) -> Dict[str, Any]:
+    """启动一个使用专用 socket 的守护进程，测量 stdio 启动经守护进程完成 initialize 的耗时。"""
+    path = os.path.join(tempfile.mkdtemp(prefix="figma_daemon_"), "daemon.sock")
+    daemon = subprocess.Popen(
+        [sys.executable, SERVER_SCRIPT, "--daemon"],
+        cwd=BACKEND_DIR, env=_env(data_folder, FIGMA_MCP_DAEMON_SOCKET=path),
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                    sock.connect(path)
+                break
+            except OSError:
+                if time.monotonic() > deadline or daemon.poll() is not None:
+                    raise RuntimeError("MCP daemon did not start")
+                time.sleep(0.05)
+        env = _env(data_folder, FIGMA_MCP_DAEMON="1", FIGMA_MCP_DAEMON_SOCKET=path)
+        samples = [_time_initialize(env) for _ in range(iterations)]
+    finally:
+        daemon.terminate()
+        try:
+            daemon.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            daemon.kill()
+    return {"n": iterations, "p50_ms": _median_ms(samples), "min_ms": round(min(samples) * 1000, 2)}
+
+
+def run(iterations: int = 5, daemon: bool = False) -> Dict[str, Any]:
+    data_folder = tempfile.mkdtemp(prefix="figma_startup_")
+    results: Dict[str, Any] = {
+        "import": measure_imports(data_folder, iterations),
+        "initialize": measure_initialize(data_folder, iterations),
+    }
+    if daemon:
+        results["daemon"] = measure_daemon(data_folder, iterations)
+    return results
+
+
+def check_budget(results: Dict[str, Any], budget_ms: float) -> List[str]:
+    failures = []
+    imports = results["import"]
+    if imports["forbidden_loaded"]:
+        failures.append(f"Heavy modules imported at startup: {', '.join(imports['forbidden_loaded'])}")
+    if imports["app_ms"] > budget_ms:
+        failures.append(f"Import time of mcp_server (excluding mcp) {imports['app_ms']}ms exceeds budget {budget_ms}ms")
+    return failures
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="MCP server cold start benchmark")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="maximum import time of mcp_server excluding the mcp package")
+    parser.add_argument("--daemon", action="store_true", help="also measure stdio launches attached to a daemon")
+    args = parser.parse_args(argv)
+
+    results = run(args.iterations, args.daemon)
+    print(json.dumps(results, indent=2))
+    failures = check_budget(results, args.budget_ms)
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
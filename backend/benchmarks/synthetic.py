@@ -0,0 +1,221 @@
+"""
+合成 Figma 文档生成器。
+
+生成结构与 Figma REST API `GET /v1/files/{key}` 响应一致的文档，
+规模 (页面数、深度、扇出) 与样式重复度均可配置，用于基准测试。
+"""
+import copy
+import random
+from typing import Any, Dict, Iterable, List, Optional
+
+LEAF_TYPES = ["RECTANGLE", "TEXT", "VECTOR", "INSTANCE", "ELLIPSE"]
+CONTAINER_TYPES = ["FRAME", "GROUP", "COMPONENT"]
+
+
+def _make_palette(style_variants: int, rng: random.Random) -> List[Dict[str, Any]]:
+    palette = []
+    for _ in range(max(1, style_variants)):
+        palette.append({
+            "fills": [{
+                "blendMode": "NORMAL",
+                "type": "SOLID",
+                "color": {"r": round(rng.random(), 4), "g": round(rng.random(), 4), "b": round(rng.random(), 4), "a": 1},
+            }],
+            "style": {
+                "fontFamily": rng.choice(["Inter", "Roboto", "PingFang SC"]),
+                "fontWeight": rng.choice([400, 500, 600, 700]),
+                "fontSize": rng.choice([12, 14, 16, 20, 24, 32]),
+                "lineHeightPx": rng.choice([16, 20, 24, 28, 40]),
+                "letterSpacing": 0,
+                "textAlignHorizontal": "LEFT",
+                "textAlignVertical": "TOP",
+            },
+        })
+    return palette
+
+
+class _Builder:
+    def __init__(self, depth: int, fanout: int, style_variants: int, component_count: int,
+                 hidden_ratio: float, seed: int):
+        self.depth = depth
+        self.fanout = fanout
+        self.hidden_ratio = hidden_ratio
+        self.rng = random.Random(seed)
+        self.palette = _make_palette(style_variants, self.rng)
+        self.component_ids = [f"900:{i}" for i in range(max(0, component_count))]
+        self.counter = 0
+        self.node_count = 0
+
+    def _next_id(self, page_index: int) -> str:
+        self.counter += 1
+        return f"{page_index + 1}:{self.counter}"
+
+    def _box(self, parent_box: Dict[str, float], index: int, siblings: int) -> Dict[str, float]:
+        # 在父节点内按行均分，保证子节点落在父节点包围盒内
+        width = parent_box["width"] / max(1, siblings)
+        height = parent_box["height"] * self.rng.uniform(0.3, 0.9)
+        return {
+            "x": round(parent_box["x"] + width * index, 2),
+            "y": round(parent_box["y"] + self.rng.uniform(0, parent_box["height"] - height), 2),
+            "width": round(width * self.rng.uniform(0.6, 1.0), 2),
+            "height": round(height, 2),
+        }
+
+    def node(self, page_index: int, level: int, box: Dict[str, float], index: int) -> Dict[str, Any]:
+        is_leaf = level >= self.depth
+        node_type = self.rng.choice(LEAF_TYPES if is_leaf else CONTAINER_TYPES)
+        node_id = self._next_id(page_index)
+        style_index = self.rng.randrange(len(self.palette))
+        style = self.palette[style_index]
+        node: Dict[str, Any] = {
+            "id": node_id,
+            "name": f"{node_type.title()} {index}",
+            "type": node_type,
+            "absoluteBoundingBox": box,
+            "fills": copy.deepcopy(style["fills"]),
+            "styles": {"fill": f"S:{style_index}"},
+            "strokes": [],
+            "strokeWeight": 1,
+            "effects": [],
+            "constraints": {"vertical": "TOP", "horizontal": "LEFT"},
+        }
+        self.node_count += 1
+        if self.rng.random() < self.hidden_ratio:
+            node["visible"] = False
+        if node_type == "TEXT":
+            node["characters"] = f"Label {node_id} " + self.rng.choice(["Checkout", "Submit", "Cancel", "Title", "Price"])
+            node["style"] = copy.deepcopy(style["style"])
+        if node_type == "INSTANCE" and self.component_ids:
+            node["componentId"] = self.rng.choice(self.component_ids)
+        if not is_leaf:
+            children = []
+            for i in range(self.fanout):
+                children.append(self.node(page_index, level + 1, self._box(box, i, self.fanout), i))
+            node["children"] = children
+        return node
+
+
+def generate_document(
+    pages: int = 2,
+    frames_per_page: int = 4,
+    depth: int = 4,
+    fanout: int = 4,
+    style_variants: int = 8,
+    component_count: int = 10,
+    hidden_ratio: float = 0.02,
+    seed: int = 42,
+    name: str = "Synthetic Design",
+    last_modified: str = "2026-01-14T05:57:11Z",
+) -> Dict[str, Any]:
+    """
+    生成一个 GetFileResponse 结构的合成文档。
+
+    depth 为每个顶层 Frame 之下的嵌套层数，fanout 为每个容器节点的子节点数；
+    style_variants 越小，fills/style 的重复度越高。
+    """
+    builder = _Builder(depth, fanout, style_variants, component_count, hidden_ratio, seed)
+    canvases = []
+    for page_index in range(pages):
+        frames = []
+        for frame_index in range(frames_per_page):
+            box = {"x": frame_index * 1600.0, "y": 0.0, "width": 1440.0, "height": 1024.0}
+            frame = builder.node(page_index, 1, box, frame_index)
+            frame["type"] = "FRAME"
+            frame["name"] = f"Frame {page_index + 1}-{frame_index}"
+            frame.pop("visible", None)
+            frames.append(frame)
+        canvases.append({
+            "id": f"{page_index}:0",
+            "name": f"Page {page_index + 1}",
+            "type": "CANVAS",
+            "backgroundColor": {"r": 1, "g": 1, "b": 1, "a": 1},
+            "children": frames,
+        })
+
+    components = {
+        component_id: {
+            "key": f"ck{i:04d}",
+            "name": f"Button/Variant {i}",
+            "description": "",
+            "remote": False,
+            "documentationLinks": [],
+        }
+        for i, component_id in enumerate(builder.component_ids)
+    }
+    styles = {
+        f"S:{i}": {"key": f"sk{i:04d}", "name": f"Color/{i}", "styleType": "FILL", "remote": False, "description": ""}
+        for i in range(len(builder.palette))
+    }
+
+    return {
+        "name": name,
+        "lastModified": last_modified,
+        "thumbnailUrl": "https://example.invalid/thumbnail.png",
+        "version": "1",
+        "role": "viewer",
+        "editorType": "figma",
+        "document": {"id": "0:0", "name": "Document", "type": "DOCUMENT", "children": canvases},
+        "components": components,
+        "componentSets": {},
+        "styles": styles,
+        "schemaVersion": 0,
+        "nodeCount": builder.node_count,
+    }
+
+
+def iter_nodes(node: Dict[str, Any]) -> Iterable[Dict[str, Any]]:
+    yield node
+    for child in node.get("children", []):
+        yield from iter_nodes(child)
+
+
+def truncate_depth(node: Dict[str, Any], depth: Optional[int], level: int = 0) -> Dict[str, Any]:
+    """按 Figma API 的 depth 语义截断子树 (depth=1 仅返回直接子节点)。"""
+    result = {k: v for k, v in node.items() if k != "children"}
+    if "children" in node and (depth is None or level < depth):
+        result["children"] = [truncate_depth(c, depth, level + 1) for c in node["children"]]
+    return result
+
+
+def file_response(document: Dict[str, Any], depth: Optional[int] = None) -> Dict[str, Any]:
+    if not depth:
+        return document
+    result = dict(document)
+    result["document"] = truncate_depth(document["document"], depth)
+    return result
+
+
+def nodes_response(document: Dict[str, Any], ids: List[str], depth: Optional[int] = None) -> Dict[str, Any]:
+    """构造 `GET /v1/files/{key}/nodes` 结构的响应，未找到的 id 返回 null。"""
+    wanted = set(ids)
+    found: Dict[str, Any] = {}
+    for node in iter_nodes(document["document"]):
+        if node.get("id") in wanted:
+            found[node["id"]] = node
+    nodes: Dict[str, Any] = {}
+    for node_id in ids:
+        node = found.get(node_id)
+        if node is None:
+            nodes[node_id] = None
+            continue
+        nodes[node_id] = {
+            "document": truncate_depth(node, depth),
+            "components": document.get("components", {}),
+            "componentSets": document.get("componentSets", {}),
+            "styles": document.get("styles", {}),
+            "schemaVersion": 0,
+        }
+    return {
+        "name": document.get("name"),
+        "lastModified": document.get("lastModified"),
+        "thumbnailUrl": document.get("thumbnailUrl"),
+        "version": document.get("version"),
+        "role": "viewer",
+        "editorType": "figma",
+        "nodes": nodes,
+    }
+
+
+def pick_node_ids(document: Dict[str, Any], count: int, node_type: str = "FRAME") -> List[str]:
+    ids = [n["id"] for n in iter_nodes(document["document"]) if n.get("type") == node_type]
+    return ids[:count]
@@ -0,0 +1,74 @@
+"""
+Cache bundle export / import.
+
+    python cache_bundle.py export bundle.tar.gz [--file-key KEY ...] [--from 2026-01-01] [--to 2026-02-01]
+    python cache_bundle.py import bundle.tar.gz [--batch-size 200]
+
+The storage backend is selected the same way as mcp_server.py (FIGMA_FILE_DATA_FOLDER / DB_HOST / internal cache),
+or explicitly with --data-folder.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[logging.StreamHandler(sys.stderr)]
+)
+
+# Ensure app can be imported
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.repository import FileSystemRepository, get_repo_and_session
+from app.services.bundle import export_bundle, import_bundle
+
+load_dotenv()
+
+def _parse_date(value: str) -> datetime:
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid date: {value}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export or import Figma cache bundles")
+    parser.add_argument("--data-folder", help="use this file system cache instead of the configured backend")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="pack cache entries into a compressed, checksummed archive")
+    export_parser.add_argument("path")
+    export_parser.add_argument("--file-key", action="append", dest="file_keys", help="repeatable; default is all files")
+    export_parser.add_argument("--from", dest="updated_from", type=_parse_date, help="updated_at lower bound (ISO date)")
+    export_parser.add_argument("--to", dest="updated_to", type=_parse_date, help="updated_at upper bound (ISO date)")
+
+    import_parser = subparsers.add_parser("import", help="load cache entries from an archive")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--batch-size", type=int, default=200)
+    import_parser.add_argument("--no-verify", action="store_true", help="skip the checksum pass")
+
+    args = parser.parse_args(argv)
+
+    if args.data_folder:
+        repo, db_session = FileSystemRepository(args.data_folder), None
+    else:
+        repo, db_session = get_repo_and_session()
+
+    try:
+        if args.command == "export":
+            manifest = export_bundle(repo, args.path, args.file_keys, args.updated_from, args.updated_to)
+            print(json.dumps(manifest, indent=2, ensure_ascii=False))
+        else:
+            result = import_bundle(repo, args.path, batch_size=args.batch_size, verify=not args.no_verify)
+            print(f"Imported {result['imported']} entries from {args.path}")
+    finally:
+        if db_session:
+            db_session.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,3 @@
-from mcp.server.fastmcp import FastMCP
 import os
 import sys
 import json
@@ -15,46 +14,29 @@ logging.basicConfig(
 # Ensure app can be imported
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from app.services.mcp_tools import get_figma_data_tool, download_figma_images_tool
-from app.repository import FileSystemRepository, MySQLRepository
-
 load_dotenv()
 
-mcp = FastMCP("Figma MCP Cache")
+# Daemon mode: this stdio launch only relays to the long-running server (started on first use),
+# so neither mcp nor any storage backend is imported here.
+if __name__ == "__main__" and "--daemon" not in sys.argv and \
+        os.getenv("FIGMA_MCP_DAEMON", "").lower() in ("1", "true", "yes"):
+    from app.daemon import attach
+    if attach(os.path.abspath(__file__)):
+        sys.exit(0)
 
-def get_repo_and_session():
-    """
-    Determine which repository to use based on environment variables.
-    Returns (repo, db_session). db_session is None if not using DB.
-    """
-    # 1. External File Persistence
-    data_folder = os.getenv("FIGMA_FILE_DATA_FOLDER")
-    if data_folder:
-        return FileSystemRepository(data_folder), None
-    
-    # 2. MySQL Configuration (Check if explicitly configured)
-    # We check for DB_HOST or DB_PASSWORD to decide if we should use MySQL.
-    # Default behavior in database.py is localhost/root/no-pass, so if user relies on that,
-    # they might need to ensure DB_HOST is set or we fallback to file.
-    # Given the requirement "No config -> internal cache", we assume MySQL usage implies explicit config.
-    if os.getenv("DB_HOST") or os.getenv("DB_PASSWORD"):
-        try:
-            from app.database import SessionLocal
-            db = SessionLocal()
-            return MySQLRepository(db), db
-        except Exception as e:
-            logging.error(f"Failed to connect to MySQL: {e}. Falling back to internal cache.")
-    
-    # 3. Internal Cache (Default)
-    internal_cache_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data_cache")
-    return FileSystemRepository(internal_cache_path), None
+from mcp.server.fastmcp import FastMCP
+from app.services.mcp_tools import get_figma_data_tool, get_figma_data_batch_tool, download_figma_images_tool
+from app.repository import get_repo_and_session
+from app.services.token_pool import get_token_pool
+
+mcp = FastMCP("Figma MCP Cache")
 
 @mcp.tool()
 def get_figma_data(file_key: str, node_id: str = None, depth: int = None) -> str:
     """
     Get comprehensive Figma file data including layout, content, visuals, and component information.
     """
-    token = os.getenv("FIGMA_ACCESS_TOKEN")
+    token = get_token_pool()
     if not token:
         return "Error: FIGMA_ACCESS_TOKEN not set"
     
@@ -70,12 +52,142 @@ def get_figma_data(file_key: str, node_id: str = None, depth: int = None) -> str
             db_session.close()
 
 @mcp.tool()
-def download_figma_images(file_key: str, nodes: str, local_path: str, png_scale: float = 2.0) -> str:
+def get_figma_data_batch(items: str) -> str:
+    """
+    Get Figma data for multiple nodes in one call. Cached nodes are answered locally; misses for the
+    same file are fetched with a single request and different files are fetched concurrently.
+    items: JSON string of list of objects {file_key, node_id, depth}
+    """
+    token = get_token_pool()
+    if not token:
+        return "Error: FIGMA_ACCESS_TOKEN not set"
+
+    repo, db_session = get_repo_and_session()
+
+    try:
+        parsed_items = json.loads(items) if isinstance(items, str) else items
+        data = get_figma_data_batch_tool(repo, token, parsed_items)
+        return json.dumps(data, indent=2, ensure_ascii=False)
+    except Exception as e:
+        return f"Error: {str(e)}"
+    finally:
+        if db_session:
+            db_session.close()
+
+@mcp.tool()
+def search_figma_nodes(query: str, file_key: str = None, node_type: str = None, limit: int = 20) -> str:
+    """
+    Full-text search over cached Figma documents by node name, text content and type.
+    Returns matching node ids with their ancestry path and bounding box, so that only the
+    needed subtree has to be requested with get_figma_data.
+    """
+    repo, db_session = get_repo_and_session()
+
+    try:
+        results = repo.search_nodes(query, file_key=file_key, node_type=node_type, limit=limit)
+        return json.dumps(results, indent=2, ensure_ascii=False)
+    except Exception as e:
+        return f"Error: {str(e)}"
+    finally:
+        if db_session:
+            db_session.close()
+
+@mcp.tool()
+def query_figma_layout(
+    file_key: str,
+    mode: str = "intersects",
+    x: float = 0,
+    y: float = 0,
+    width: float = 0,
+    height: float = 0,
+    node_id: str = None,
+    node_type: str = None,
+    limit: int = None,
+    page_id: str = None,
+    cache_node_id: str = None,
+) -> str:
+    """
+    Spatial query over cached nodes by absoluteBoundingBox, answered from the local index.
+    mode: "point" (nodes under x,y, innermost first), "intersects" / "contains" (nodes intersecting
+    or fully inside the x,y,width,height region), "nearest_sibling" (closest sibling of node_id).
+    page_id: restrict to one page (CANVAS id); pages share a coordinate space, so results otherwise mix pages.
+    cache_node_id: restrict to one cache entry ("" for the whole-file entry, or the node_id it was fetched with).
+    """
+    repo, db_session = get_repo_and_session()
+
+    try:
+        results = repo.query_layout(file_key, mode=mode, x=x, y=y, width=width, height=height,
+                                    node_id=node_id, cache_node_id=cache_node_id, node_type=node_type,
+                                    limit=limit, page_id=page_id)
+        return json.dumps(results, indent=2, ensure_ascii=False)
+    except Exception as e:
+        return f"Error: {str(e)}"
+    finally:
+        if db_session:
+            db_session.close()
+
+@mcp.tool()
+def query_figma_catalog(
+    query: str = None,
+    key: str = None,
+    kind: str = None,
+    file_key: str = None,
+    usages: bool = False,
+    limit: int = 20,
+) -> str:
+    """
+    Look up components, component sets and styles across cached Figma files without loading the documents.
+    query: case-insensitive name match, e.g. "Button/Primary"; key: component / style key (or node id).
+    kind: "component", "component_set" or "style".
+    Returns the definition node ids and instance count per file. With usages=true and a key,
+    returns the instance nodes of that component or style in each file instead.
+    """
+    repo, db_session = get_repo_and_session()
+
+    try:
+        if usages:
+            if not key:
+                return "Error: key is required when usages is true"
+            results = repo.catalog_usages(key, file_key=file_key, limit=max(limit, 100))
+        else:
+            results = repo.lookup_catalog(query=query, key=key, kind=kind, file_key=file_key, limit=limit)
+        return json.dumps(results, indent=2, ensure_ascii=False)
+    except Exception as e:
+        return f"Error: {str(e)}"
+    finally:
+        if db_session:
+            db_session.close()
+
+@mcp.tool()
+def get_figma_changes(file_key: str, node_id: str = None, from_version: str = None, to_version: str = None) -> str:
+    """
+    Get only the nodes added, removed or modified between two cached versions of a Figma file or node.
+    Versions are Figma lastModified values (as returned in metadata.lastModified) or version sequence numbers.
+    Defaults to the latest version compared with the one before it.
+    """
+    repo, db_session = get_repo_and_session()
+
+    try:
+        changes = repo.get_changes(file_key, node_id, from_version=from_version, to_version=to_version)
+        return json.dumps(changes, indent=2, ensure_ascii=False)
+    except Exception as e:
+        return f"Error: {str(e)}"
+    finally:
+        if db_session:
+            db_session.close()
+
+@mcp.tool()
+def download_figma_images(
+    file_key: str, nodes: str, local_path: str, png_scale: float = 2.0, optimize: bool = False, webp: bool = False
+) -> str:
     """
     Download SVG and PNG images used in a Figma file based on the IDs of image or icon nodes.
     nodes: JSON string of list of objects {nodeId, fileName, imageRef, ...}
+    optimize: losslessly shrink the downloaded files (minify SVG, recompress PNG) and report sizes before/after.
+    SVGs usually shrink noticeably; PNG recompression keeps the existing row filters, so gains are marginal.
+    webp: also write a lossless .webp next to each PNG (requires Pillow); without optimize the originals are left untouched
     """
-    token = os.getenv("FIGMA_ACCESS_TOKEN")
+    token = get_token_pool()
     if not token:
         return "Error: FIGMA_ACCESS_TOKEN not set"
         
@@ -87,9 +199,13 @@ def download_figma_images(file_key: str, nodes: str, local_path: str, png_scale:
             except:
                 pass # Try as object if passed by python SDK?
             
-        return download_figma_images_tool(token, file_key, parsed_nodes, local_path, png_scale)
+        return download_figma_images_tool(token, file_key, parsed_nodes, local_path, png_scale, optimize, webp)
     except Exception as e:
         return f"Error: {str(e)}"
 
 if __name__ == "__main__":
-    mcp.run()
+    if "--daemon" in sys.argv:
+        from app.daemon import serve
+        serve(mcp, os.path.abspath(__file__))
+    else:
+        mcp.run()
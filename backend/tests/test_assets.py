@@ -0,0 +1,57 @@
+"""
+资源优化：SVG 精简不改变渲染结果 (图片填充、文字空白、无障碍文本)，只输出 WebP 时不改动原文件。
+
+    cd backend && python -m pytest tests
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.assets import minify_svg, optimize_asset
+
+# Figma 导出的带图片填充的节点 (图片数据截短)
+FIGMA_IMAGE_FILL_SVG = """<svg width="256" height="256" viewBox="0 0 256 256" fill="none" xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink">
+<rect width="256" height="256" fill="url(#pattern0_1_2)"/>
+<defs>
+<pattern id="pattern0_1_2" patternContentUnits="objectBoundingBox" width="1" height="1">
+<use xlink:href="#image0_1_2" transform="scale(0.00390625)"/>
+</pattern>
+<image id="image0_1_2" width="256" height="256" xlink:href="data:image/png;base64,iVBORw0KGgo="/>
+</defs>
+</svg>
+"""
+
+
+def test_image_fill_transform_survives():
+    out = minify_svg(FIGMA_IMAGE_FILL_SVG)
+    assert 'transform="scale(.0039062)"' in out
+    assert 'xlink:href="#image0_1_2"' in out
+    assert len(out) < len(FIGMA_IMAGE_FILL_SVG)
+
+
+def test_transform_rounding_keeps_significant_digits():
+    svg = '<svg><g transform="matrix(0.000012345 0 0 1.23456789 10.123456 -0.5)"><path d="M0.123456 1.5L2 3"/></g></svg>'
+    out = minify_svg(svg)
+    assert 'transform="matrix(1.2345e-05 0 0 1.2346 10.123 -.5)"' in out
+    assert 'd="M.12 1.5L2 3"' in out
+
+
+def test_text_whitespace_and_descriptions_kept():
+    svg = """<svg>
+  <title>Logo</title>
+  <text x="1.2345"><tspan>Hello</tspan> <tspan>World</tspan></text>
+</svg>"""
+    out = minify_svg(svg)
+    assert "<tspan>Hello</tspan> <tspan>World</tspan>" in out
+    assert "<title>Logo</title>" in out
+    assert "<title>" not in minify_svg(svg, strip_descriptions=True)
+
+
+def test_webp_only_leaves_original(tmp_path):
+    path = tmp_path / "icon.svg"
+    path.write_text(FIGMA_IMAGE_FILL_SVG)
+    result = optimize_asset(str(path), webp=True, optimize=False)
+    assert path.read_text() == FIGMA_IMAGE_FILL_SVG
+    assert result["before"] == result["after"]
+    assert "webp" not in result
@@ -0,0 +1,61 @@
+"""
+批量获取：命中缓存的条目本地返回，未命中的同一文件节点合并为一次 /nodes 请求；
+共享缓存模式下命中通过一次批量读取完成。
+
+    cd backend && python -m pytest tests
+"""
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.cache_stub import CacheStubServer
+from benchmarks.figma_stub import FigmaStubServer
+from benchmarks.synthetic import generate_document, pick_node_ids
+from app.repository import FileSystemRepository, RemoteRepository
+from app.services.mcp_tools import get_figma_data_batch_tool
+
+
+def _documents():
+    return {
+        "FILE_A": generate_document(pages=1, frames_per_page=3, depth=2, fanout=2, seed=1),
+        "FILE_B": generate_document(pages=1, frames_per_page=2, depth=2, fanout=2, seed=2),
+    }
+
+
+def test_misses_grouped_into_one_nodes_request_per_file(tmp_path, monkeypatch):
+    documents = _documents()
+    items = [{"file_key": key, "node_id": node_id}
+             for key, count in (("FILE_A", 3), ("FILE_B", 2))
+             for node_id in pick_node_ids(documents[key], count)]
+    repo = FileSystemRepository(str(tmp_path))
+
+    with FigmaStubServer(documents) as stub:
+        monkeypatch.setenv("FIGMA_API_BASE_URL", stub.base_url)
+        results = get_figma_data_batch_tool(repo, "token", items)
+        assert [r["cache"] for r in results] == ["MISS"] * 5
+        assert sorted(stub.request_log) == ["/v1/files/FILE_A/nodes", "/v1/files/FILE_B/nodes"]
+        assert [r["data"]["nodes"][0]["id"] for r in results] == [i["node_id"] for i in items]
+
+        # 每个节点单独缓存，再次请求全部命中且不访问 Figma
+        results = get_figma_data_batch_tool(repo, "token", items)
+        assert [r["cache"] for r in results] == ["HIT"] * 5
+        assert len(stub.request_log) == 2
+
+
+def test_remote_hits_use_one_bulk_lookup(tmp_path):
+    documents = _documents()
+    node_ids = pick_node_ids(documents["FILE_A"], 3)
+    with CacheStubServer(str(tmp_path)) as cache:
+        for node_id in node_ids:
+            cache.repo.save_data("FILE_A", node_id, json.dumps({"nodes": [{"id": node_id}]}), None, None, None)
+        repo = RemoteRepository(cache.base_url, fresh_seconds=0)
+        items = [{"file_key": "FILE_A", "node_id": node_id} for node_id in node_ids]
+
+        assert [r["cache"] for r in get_figma_data_batch_tool(repo, "token", items)] == ["HIT"] * 3
+        assert (cache.stats["lookup"], cache.stats["get"]) == (1, 0)
+
+        # 内存层过期后按 ETag 重新验证，未变化的条目不再传输数据
+        assert [r["cache"] for r in get_figma_data_batch_tool(repo, "token", items)] == ["HIT"] * 3
+        assert (cache.stats["lookup"], cache.stats["not_modified"]) == (2, 3)
@@ -0,0 +1,75 @@
+"""
+缓存包：导出 / 导入往返后条目与侧索引一致，条目被篡改时校验失败拒绝导入。
+
+    cd backend && python -m pytest tests
+"""
+import io
+import os
+import sys
+import tarfile
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import file_response, generate_document, nodes_response, pick_node_ids
+from app.repository import FileSystemRepository
+from app.services.bundle import ENTRIES_NAME, MANIFEST_NAME, export_bundle, import_bundle, verify_bundle
+from app.services.figma import process_figma_response
+
+
+def _source(tmp_path):
+    repo = FileSystemRepository(str(tmp_path / "source"))
+    document = generate_document(pages=2, frames_per_page=3, depth=2, fanout=2, seed=4)
+    repo.save_data("FILE", None, process_figma_response(file_response(document)), document["name"], None, None)
+    for node_id in pick_node_ids(document, 3):
+        data = process_figma_response(nodes_response(document, [node_id]))
+        repo.save_data("FILE", node_id, data, document["name"], 2, None)
+    repo.save_data("OTHER", None, {"nodes": []}, "Other", None, None)
+    return repo
+
+
+def _keys(repo):
+    return sorted((e.file_key, e.node_id or "") for e in repo.iter_entries())
+
+
+def test_round_trip_restores_entries_and_indexes(tmp_path):
+    source = _source(tmp_path)
+    path = str(tmp_path / "cache.tar.gz")
+    manifest = export_bundle(source, path)
+    assert (manifest["count"], manifest["file_keys"]) == (5, ["FILE", "OTHER"])
+
+    target = FileSystemRepository(str(tmp_path / "target"))
+    result = import_bundle(target, path, batch_size=2)
+    assert result["imported"] == 5
+    assert _keys(target) == _keys(source)
+    assert target.get_data("FILE").data == source.get_data("FILE").data
+
+    # save_many 按批更新侧索引
+    assert target.search_nodes("Label", limit=50) == source.search_nodes("Label", limit=50)
+    assert target.query_layout("FILE", mode="point", x=10, y=10) == source.query_layout("FILE", mode="point", x=10, y=10)
+
+    only = export_bundle(source, str(tmp_path / "only.tar.gz"), file_keys=["OTHER"])
+    assert only["count"] == 1
+
+
+def test_tampered_entries_rejected(tmp_path):
+    source = _source(tmp_path)
+    path = str(tmp_path / "cache.tar.gz")
+    export_bundle(source, path)
+
+    with tarfile.open(path, "r:gz") as tar:
+        manifest = tar.extractfile(MANIFEST_NAME).read()
+        entries = tar.extractfile(ENTRIES_NAME).read().replace(b"Synthetic", b"Tampered!")
+    tampered = str(tmp_path / "tampered.tar.gz")
+    with tarfile.open(tampered, "w:gz") as tar:
+        for name, content in ((MANIFEST_NAME, manifest), (ENTRIES_NAME, entries)):
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            tar.addfile(info, io.BytesIO(content))
+
+    assert verify_bundle(path)["count"] == 5
+    target = FileSystemRepository(str(tmp_path / "target"))
+    with pytest.raises(ValueError, match="checksum mismatch"):
+        import_bundle(target, tampered)
+    assert _keys(target) == []
@@ -0,0 +1,67 @@
+"""
+组件 / 样式目录：按名称或 key 查找，统计实例与样式使用节点；
+样式使用来自处理结果顶层的 styleUsages，节点本身不再携带 styles。
+
+    cd backend && python -m pytest tests
+"""
+import os
+import sys
+from collections import Counter
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import file_response, generate_document, iter_nodes
+from app.repository import FileSystemRepository
+from app.services.figma import iter_simplified_nodes, process_figma_response
+
+
+def _document(seed):
+    return generate_document(pages=2, frames_per_page=2, depth=3, fanout=3, hidden_ratio=0, seed=seed)
+
+
+def _expected(document):
+    nodes = list(iter_nodes(document["document"]))
+    instances = Counter(n["componentId"] for n in nodes if n.get("componentId"))
+    styles = Counter(s for n in nodes for s in set((n.get("styles") or {}).values()))
+    return instances, styles
+
+
+def test_style_usages_are_top_level():
+    document = _document(1)
+    data = process_figma_response(file_response(document))
+    _, styles = _expected(document)
+    assert {style_id: len(ids) for style_id, ids in data["styleUsages"].items()} == dict(styles)
+    assert all("styles" not in node for node, _ in iter_simplified_nodes(data))
+
+
+def test_lookup_by_name_and_key(tmp_path):
+    repo = FileSystemRepository(str(tmp_path))
+    document = _document(2)
+    repo.save_data("DS", None, process_figma_response(file_response(document)), document["name"], None, None)
+    instances, styles = _expected(document)
+
+    components = repo.lookup_catalog(query="button/variant", limit=50)
+    assert {c["id"] for c in components} == {f"900:{i}" for i in range(10)}
+    assert all(c["kind"] == "component" and c["file_key"] == "DS" for c in components)
+    assert {c["id"]: c["instance_count"] for c in components if c["instance_count"]} == dict(instances)
+
+    [style] = repo.lookup_catalog(key="sk0000", kind="style")
+    assert (style["id"], style["name"], style["style_type"]) == ("S:0", "Color/0", "FILL")
+    assert style["instance_count"] == styles["S:0"]
+    assert repo.lookup_catalog(query="Color/", kind="component") == []
+
+
+def test_usages_grouped_by_file(tmp_path):
+    repo = FileSystemRepository(str(tmp_path))
+    for file_key, seed in (("A", 3), ("B", 4)):
+        document = _document(seed)
+        repo.save_data(file_key, None, process_figma_response(file_response(document)), document["name"], None, None)
+    expected = {key: _expected(_document(seed))[0]["900:1"] for key, seed in (("A", 3), ("B", 4))}
+
+    usages = repo.catalog_usages("ck0001")
+    assert usages["total"] == sum(expected.values()) > 0
+    assert {f["file_key"]: f["instance_count"] for f in usages["files"] if f["instance_count"]} == \
+        {k: v for k, v in expected.items() if v}
+    only_a = repo.catalog_usages("ck0001", file_key="A", limit=1)
+    assert [f["file_key"] for f in only_a["files"]] == ["A"]
+    assert len(only_a["files"][0]["instances"]) <= 1
@@ -0,0 +1,77 @@
+"""
+共享缓存模式：内存层过期后用 ETag 重新校验 (304 不重传数据)，上传为 gzip，
+共享缓存不可用时读写退化为内存层，条目按游标分页遍历。
+
+    cd backend && python -m pytest tests
+"""
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.cache_stub import CacheStubServer
+from benchmarks.figma_stub import FigmaStubServer
+from benchmarks.synthetic import generate_document
+from app.repository import RemoteRepository
+from app.services.mcp_tools import get_figma_data_tool
+
+
+def test_stale_entry_revalidated_with_etag(tmp_path):
+    with CacheStubServer(str(tmp_path)) as cache:
+        cache.repo.save_data("FILE", None, {"name": "cached"}, "File", None, None)
+        repo = RemoteRepository(cache.base_url, fresh_seconds=0)
+
+        first = repo.get_data("FILE")
+        assert json.loads(first.data) == {"name": "cached"}
+        bytes_out = cache.stats["bytes_out"]
+        assert repo.get_data("FILE") is first
+        assert (cache.stats["get"], cache.stats["not_modified"]) == (2, 1)
+        assert cache.stats["bytes_out"] == bytes_out
+
+        # 数据变化后 ETag 不再匹配，返回新内容
+        cache.repo.save_data("FILE", None, {"name": "updated"}, "File", None, None)
+        assert json.loads(repo.get_data("FILE").data) == {"name": "updated"}
+        assert repo.get_data("FILE", "1:2") is None
+
+
+def test_upload_is_gzipped(tmp_path):
+    with CacheStubServer(str(tmp_path)) as cache:
+        repo = RemoteRepository(cache.base_url)
+        data = {"nodes": [{"name": "Frame"}] * 200}
+        repo.save_data("FILE", "1:2", data, "File", 2, None)
+        assert cache.stats["put"] == 1
+        assert cache.stats["bytes_in"] < len(json.dumps(data)) / 4
+        assert json.loads(cache.repo.get_data("FILE", "1:2").data) == data
+
+
+def test_cache_down_falls_back_to_memory(tmp_path, monkeypatch):
+    document = generate_document(pages=1, frames_per_page=2, depth=2, fanout=2, seed=3)
+    cache = CacheStubServer(str(tmp_path)).start()
+    repo = RemoteRepository(cache.base_url, fresh_seconds=0, timeout=2)
+    cache.repo.save_data("CACHED", None, {"name": "cached"}, "Cached", None, None)
+    cached = repo.get_data("CACHED")
+    cache.stop()
+
+    assert repo.get_data("CACHED") is cached
+    assert repo.get_many([("CACHED", None), ("MISSING", None)]) == {("CACHED", None): cached}
+
+    # Figma 请求成功但共享缓存写入失败：结果照常返回并保留在内存层
+    with FigmaStubServer({"FILE": document}) as figma:
+        monkeypatch.setenv("FIGMA_API_BASE_URL", figma.base_url)
+        data = get_figma_data_tool(repo, "token", "FILE")
+        assert data["metadata"]["name"] == document["name"]
+        assert json.loads(repo.get_data("FILE").data) == data
+        assert len(figma.request_log) == 1
+
+
+def test_iter_entries_pages_through_all(tmp_path):
+    with CacheStubServer(str(tmp_path)) as cache:
+        for i in range(7):
+            cache.repo.save_data("FILE", f"1:{i}", {"i": i}, "File", None, None)
+        cache.repo.save_data("OTHER", None, {"i": -1}, "Other", None, None)
+        repo = RemoteRepository(cache.base_url)
+
+        entries = list(repo.iter_entries(file_keys=["FILE"], page_size=3))
+        assert sorted(e.node_id for e in entries) == [f"1:{i}" for i in range(7)]
+        assert len(list(repo.iter_entries(page_size=3))) == 8
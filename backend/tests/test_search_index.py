@@ -0,0 +1,67 @@
+"""
+节点全文索引：按名称 / 文本前缀匹配，同一节点去重时优先整文件条目中的完整路径，重新保存时整体替换。
+
+    cd backend && python -m pytest tests
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.figma import process_figma_response
+from app.services.search_index import NodeSearchIndex
+
+
+def _box(x, y, w, h):
+    return {"x": x, "y": y, "width": w, "height": h}
+
+
+BUTTON = {
+    "id": "1:3", "name": "Checkout Button", "type": "FRAME", "absoluteBoundingBox": _box(10, 10, 100, 40),
+    "children": [{"id": "1:4", "name": "Label", "type": "TEXT", "characters": "Pay now", "absoluteBoundingBox": _box(20, 20, 60, 20)}],
+}
+FILE = {
+    "name": "Shop", "lastModified": "2026-02-01T00:00:00Z",
+    "document": {"id": "0:0", "name": "Document", "type": "DOCUMENT", "children": [
+        {"id": "0:1", "name": "Cart", "type": "CANVAS", "children": [
+            {"id": "1:2", "name": "Cart Screen", "type": "FRAME", "absoluteBoundingBox": _box(0, 0, 400, 800), "children": [BUTTON]},
+        ]},
+    ]},
+}
+NODES = {"name": "Shop", "lastModified": "2026-02-01T00:00:00Z", "nodes": {"1:3": {"document": BUTTON}}}
+
+
+def test_prefix_match_on_name_and_text(tmp_path):
+    index = NodeSearchIndex(str(tmp_path / "search.db"))
+    index.index_document("SHOP", None, process_figma_response(FILE))
+
+    [hit] = index.search("check butt")
+    assert (hit["node_id"], hit["path"], hit["path_ids"]) == ("1:3", ["Cart", "Cart Screen"], ["0:1", "1:2"])
+    assert hit["absoluteBoundingBox"] == _box(10, 10, 100, 40)
+    assert [h["node_id"] for h in index.search("pay")] == ["1:4"]
+    assert index.search("pay", node_type="frame") == []
+    assert index.search("pay", file_key="OTHER") == []
+    assert index.search("  ") == []
+
+
+def test_duplicate_hits_prefer_whole_file_path(tmp_path):
+    index = NodeSearchIndex(str(tmp_path / "search.db"))
+    # 节点条目先于整文件条目写入，排名相同也应返回整文件中的完整路径
+    index.index_document("SHOP", "1:3", process_figma_response(NODES))
+    [hit] = index.search("checkout")
+    assert (hit["cache_node_id"], hit["path"]) == ("1:3", [])
+
+    index.index_document("SHOP", None, process_figma_response(FILE))
+    [hit] = index.search("checkout")
+    assert (hit["cache_node_id"], hit["path"]) == (None, ["Cart", "Cart Screen"])
+
+
+def test_resave_replaces_rows_and_remove_drops_them(tmp_path):
+    index = NodeSearchIndex(str(tmp_path / "search.db"))
+    index.index_document("SHOP", None, process_figma_response(FILE))
+    index.index_document("OTHER", None, process_figma_response(FILE))
+    index.index_document("SHOP", None, process_figma_response(FILE))
+    assert sorted(h["file_key"] for h in index.search("checkout")) == ["OTHER", "SHOP"]
+
+    index.remove_document("SHOP", None)
+    assert [h["file_key"] for h in index.search("checkout")] == ["OTHER"]
@@ -0,0 +1,80 @@
+"""
+布局空间查询：点查询最内层优先，contains 只返回完全落在区域内的节点，
+nearest_sibling 返回同父节点中最近的兄弟，page_id 区分坐标重叠的页面。
+
+    cd backend && python -m pytest tests
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.repository import FileSystemRepository
+from app.services.figma import process_figma_response
+
+
+def _node(node_id, name, x, y, w, h, children=(), node_type="FRAME"):
+    return {"id": node_id, "name": name, "type": node_type,
+            "absoluteBoundingBox": {"x": x, "y": y, "width": w, "height": h}, "children": list(children)}
+
+
+def _page(page, name):
+    # 两个页面的节点坐标完全相同
+    return {"id": f"{page}:0", "name": name, "type": "CANVAS", "children": [
+        _node(f"{page}:1", f"{name} Screen", 0, 0, 400, 800, [
+            _node(f"{page}:2", "Header", 0, 0, 400, 80, [_node(f"{page}:3", "Title", 20, 20, 120, 30, node_type="TEXT")]),
+            _node(f"{page}:4", "Card", 20, 120, 360, 200),
+            _node(f"{page}:5", "Footer", 0, 720, 400, 80),
+        ]),
+    ]}
+
+
+def _repo(tmp_path):
+    repo = FileSystemRepository(str(tmp_path))
+    response = {"name": "App", "lastModified": "2026-02-01T00:00:00Z",
+                "document": {"id": "0:0", "name": "Document", "type": "DOCUMENT",
+                             "children": [_page(1, "Home"), _page(2, "Profile")]}}
+    repo.save_data("APP", None, process_figma_response(response), "App", None, None)
+    return repo
+
+
+def test_point_returns_innermost_first(tmp_path):
+    repo = _repo(tmp_path)
+    hits = repo.query_layout("APP", mode="point", x=30, y=30, page_id="1:0")
+    assert [h["node_id"] for h in hits] == ["1:3", "1:2", "1:1"]
+    assert hits[0]["parent_id"] == "1:2"
+    assert repo.query_layout("APP", mode="point", x=30, y=30, node_type="text", page_id="1:0")[0]["name"] == "Title"
+
+
+def test_contains_only_fully_inside(tmp_path):
+    repo = _repo(tmp_path)
+    hits = repo.query_layout("APP", mode="contains", x=0, y=0, width=400, height=330, page_id="1:0")
+    # Card 完全在区域内，Footer 不相交，Screen 超出区域
+    assert sorted(h["node_id"] for h in hits) == ["1:2", "1:3", "1:4"]
+    intersects = repo.query_layout("APP", mode="intersects", x=0, y=300, width=400, height=10, page_id="1:0")
+    assert sorted(h["node_id"] for h in intersects) == ["1:1", "1:4"]
+
+
+def test_nearest_sibling_shares_parent(tmp_path):
+    repo = _repo(tmp_path)
+    [sibling] = repo.query_layout("APP", mode="nearest_sibling", node_id="1:4")
+    assert (sibling["node_id"], sibling["parent_id"], sibling["direction"]) == ("1:2", "1:1", "above")
+    assert sibling["distance"] == 40
+    assert repo.query_layout("APP", mode="nearest_sibling", node_id="1:0") == []
+
+
+def test_page_id_separates_overlapping_pages(tmp_path):
+    repo = _repo(tmp_path)
+    both = repo.query_layout("APP", mode="point", x=30, y=30)
+    assert {h["page_id"] for h in both} == {"1:0", "2:0"}
+    assert [h["node_id"] for h in repo.query_layout("APP", mode="point", x=30, y=30, page_id="2:0")] == ["2:3", "2:2", "2:1"]
+
+
+def test_duplicate_hits_prefer_whole_file_row(tmp_path):
+    repo = FileSystemRepository(str(tmp_path))
+    # 节点条目先于整文件条目写入
+    card = _node("1:4", "Card", 20, 120, 360, 200)
+    repo.save_data("APP", "1:4", process_figma_response({"name": "App", "nodes": {"1:4": {"document": card}}}), "App", 1, None)
+    _repo(tmp_path)
+    [hit] = repo.query_layout("APP", mode="point", x=200, y=200, node_type="FRAME", limit=1)
+    assert (hit["node_id"], hit["parent_id"], hit["page_id"]) == ("1:4", "1:1", "1:0")
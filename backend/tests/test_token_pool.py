@@ -0,0 +1,61 @@
+"""
+TokenPool 共享状态：不同进程 (此处以两个令牌池实例模拟) 通过同一状态文件共享冷却期与交互式等待。
+
+    cd backend && python -m pytest tests
+"""
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.token_pool import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, SharedTokenState, TokenPool
+
+
+def _pools(tmp_path):
+    path = str(tmp_path / "token_pool.db")
+    return TokenPool(["tok-a"], shared=SharedTokenState(path)), TokenPool(["tok-a"], shared=SharedTokenState(path))
+
+
+def test_cooldown_is_shared(tmp_path):
+    mcp_pool, api_pool = _pools(tmp_path)
+    token = mcp_pool.acquire()
+    mcp_pool.release(token, 429, {"Retry-After": "30"})
+
+    with pytest.raises(RuntimeError):
+        api_pool.acquire(PRIORITY_BACKGROUND, timeout=0.2)
+
+
+def test_background_yields_to_interactive_waiter_in_other_pool(tmp_path):
+    mcp_pool, api_pool = _pools(tmp_path)
+    token = mcp_pool.acquire()
+    mcp_pool.release(token, 429, {"Retry-After": "1"})
+
+    acquired = {}
+
+    def interactive():
+        mcp_pool.acquire(PRIORITY_INTERACTIVE, timeout=5)
+        acquired["interactive"] = time.monotonic()
+
+    thread = threading.Thread(target=interactive)
+    thread.start()
+    time.sleep(0.2)
+    # 冷却结束后，MCP 进程中等待的交互式请求先于管理后台的同步获得 token
+    api_pool.acquire(PRIORITY_BACKGROUND, timeout=5)
+    acquired["background"] = time.monotonic()
+    thread.join()
+    assert acquired["interactive"] <= acquired["background"]
+
+
+def test_release_keeps_cooldown_from_other_pool(tmp_path):
+    mcp_pool, api_pool = _pools(tmp_path)
+    token = mcp_pool.acquire()
+    mcp_pool.release(token, 429, {"Retry-After": "30"})
+    # 另一进程中在途请求的响应不应清除共享的冷却期
+    api_pool.release("tok-a", 200, {"X-RateLimit-Remaining": "50"})
+
+    with pytest.raises(RuntimeError):
+        mcp_pool.acquire(PRIORITY_INTERACTIVE, timeout=0.2)
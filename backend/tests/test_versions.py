@@ -0,0 +1,79 @@
+"""
+VersionStore 版本链：增量回放还原每个版本，同一 lastModified 不追加新版本。
+
+    cd backend && python -m pytest tests
+"""
+import copy
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import generate_document, iter_nodes
+from app.services.figma import process_figma_response
+from app.services.versions import SNAPSHOT_INTERVAL, VersionStore, apply_delta, flatten_tree, _unpack
+
+
+def _edit(document, step):
+    """模拟一次设计修改：改名、删除一个节点并新增一个节点，同时推进 lastModified。"""
+    document = copy.deepcopy(document)
+    document["lastModified"] = f"2026-02-01T00:00:{step:02d}Z"
+    frame = document["document"]["children"][0]["children"][0]
+    nodes = [n for n in iter_nodes(frame) if n is not frame]
+    nodes[step % len(nodes)]["name"] = f"Renamed {step}"
+    if frame.get("children") and len(frame["children"]) > 1:
+        frame["children"].pop()
+    frame.setdefault("children", []).append({
+        "id": f"99:{step}",
+        "name": f"Added {step}",
+        "type": "RECTANGLE",
+        "absoluteBoundingBox": {"x": step, "y": step, "width": 10, "height": 10},
+    })
+    return document
+
+
+def test_deltas_rebuild_every_version(tmp_path):
+    store = VersionStore(str(tmp_path / "versions.db"))
+    document = generate_document(pages=1, frames_per_page=2, depth=3, fanout=3)
+    expected = []
+    for step in range(SNAPSHOT_INTERVAL + 5):
+        if step:
+            document = _edit(document, step)
+        data = process_figma_response(document)
+        store.index_document("F1", None, data)
+        expected.append(flatten_tree(data))
+
+    versions = store.list_versions("F1")
+    assert [v["seq"] for v in versions] == list(range(1, len(expected) + 1))
+    assert [v["snapshot"] for v in versions].count(True) == 2
+
+    # 直接按存储的快照 / 增量顺序回放
+    rows = store._connect().execute(
+        "SELECT is_snapshot, payload FROM versions WHERE file_key = 'F1' AND cache_node_id = '' ORDER BY seq"
+    ).fetchall()
+    tree = {}
+    for (is_snapshot, payload), want in zip(rows, expected):
+        tree = _unpack(payload) if is_snapshot else apply_delta(tree, _unpack(payload))
+        assert tree == want
+
+    for seq, want in enumerate(expected, start=1):
+        assert store.load_tree("F1", None, seq) == want
+
+
+def test_same_last_modified_replaces_head(tmp_path):
+    store = VersionStore(str(tmp_path / "versions.db"))
+    document = generate_document(pages=1, frames_per_page=2, depth=3, fanout=3)
+    store.index_document("F1", None, process_figma_response(document))
+    document = _edit(document, 1)
+    store.index_document("F1", None, process_figma_response(document, max_depth=1))
+
+    # 以完整深度重新获取同一版本，不应产生新版本或虚假的新增节点
+    full = process_figma_response(document)
+    store.index_document("F1", None, full)
+    versions = store.list_versions("F1")
+    assert [v["seq"] for v in versions] == [1, 2]
+    assert store.load_tree("F1", None, 2) == flatten_tree(full)
+
+    changes = store.changes("F1")
+    added_ids = {node["id"] for node in changes["added"]}
+    assert added_ids == {"99:1"}
@@ -8,5 +8,6 @@ export const getCacheList = (params) => api.get('/cache', { params });
 export const deleteCache = (id) => api.delete(`/cache/${id}`);
 export const syncCache = (id) => api.post(`/sync/${id}`);
 export const getCacheDetail = (id) => api.get(`/cache/${id}`);
+export const searchNodes = (params) => api.get('/search', { params });
 
 export default api;